@@ -0,0 +1,59 @@
+"""Ручная сериализация постов для JSON API.
+
+Для каждого поля ответа известны колонки, которые нужно выбрать из базы,
+поэтому `fields=` сужает и SELECT, и ответ.
+"""
+
+
+def post_image(post):
+    return post.image.url if post.image else None
+
+
+def post_group(post):
+    return post.group.slug if post.group_id is not None else None
+
+
+POST_FIELDS = {
+    'id': ((), lambda post: post.pk),
+    'text': (('text',), lambda post: post.text),
+    'html': (('text_html',), lambda post: post.text_html),
+    'excerpt': (('excerpt',), lambda post: post.excerpt),
+    'pub_date': ((), lambda post: post.pub_date.isoformat()),
+    'author': (('author__username',), lambda post: post.author.username),
+    'group': (('group__slug',), post_group),
+    'image': (('image',), post_image),
+}
+DEFAULT_FIELDS = ('id', 'text', 'pub_date', 'author', 'group')
+# Нужны всегда: по ним строится курсор и соединяются таблицы.
+KEY_COLUMNS = ('pub_date', 'author', 'group')
+
+
+def parse_fields(value):
+    """Список полей из параметра `fields=` или None, если поле неизвестно."""
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',')
+                                 if field.strip()))
+    if not fields or any(field not in POST_FIELDS for field in fields):
+        return None
+    return fields
+
+
+def select_fields(queryset, fields):
+    """Ограничить queryset колонками, нужными для `fields`."""
+    columns = list(KEY_COLUMNS)
+    related = []
+    for field in fields:
+        columns.extend(POST_FIELDS[field][0])
+    if 'author' in fields:
+        related.append('author')
+    if 'group' in fields:
+        related.append('group')
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*columns)
+
+
+def serialize_post(post, fields):
+    return {field: POST_FIELDS[field][1](post) for field in fields}
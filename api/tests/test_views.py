@@ -0,0 +1,99 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya')
+        cls.group = Group.objects.create(title='Тест', slug='test',
+                                         description='Домашние тесты')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=cls.user,
+                                group=cls.group if i % 2 else None)
+            for i in range(13)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def get_json(self, url, status=200, **params):
+        response = self.client.get(url, params)
+        self.assertEquals(response.status_code, status)
+        self.assertEquals(response['Content-Type'], 'application/json')
+        return json.loads(response.content)
+
+    def test_feed_pages_follow_cursor(self):
+        url = reverse('api:index')
+        first = self.get_json(url)
+        second = self.get_json(url, after=first['next'])
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEquals(ids, [post.pk for post in self.posts[::-1]])
+        self.assertIsNone(second['next'])
+        self.assertEquals(first['results'][0], {
+            'id': self.posts[-1].pk,
+            'text': 'Пост 12',
+            'pub_date': self.posts[-1].pub_date.isoformat(),
+            'author': 'Ya',
+            'group': None,
+        })
+
+    def test_fields_limit_payload_and_columns(self):
+        url = reverse('api:author_posts', args=['Ya'])
+        with self.assertNumQueries(2) as queries:
+            data = self.get_json(url, fields='id,group')
+        sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"text"', sql)
+        self.assertNotIn('"auth_user"', sql)
+        self.assertEquals(set(data['results'][0]), {'id', 'group'})
+
+    def test_group_feed(self):
+        data = self.get_json(reverse('api:group_posts', args=['test']))
+        self.assertEquals(len(data['results']), 6)
+        self.assertEquals({post['group'] for post in data['results']},
+                          {'test'})
+
+    def test_post_detail(self):
+        post = self.posts[3]
+        data = self.get_json(reverse('api:post', args=[post.pk]),
+                             fields='text')
+        self.assertEquals(data, {'text': 'Пост 3'})
+
+    def test_multi_get_keeps_order_in_one_query(self):
+        ids = [self.posts[5].pk, 0, self.posts[1].pk]
+        with self.assertNumQueries(1):
+            self.get_json(reverse('api:posts_by_id'), fields='id',
+                          ids=','.join(map(str, ids[::2])))
+        # ненайденные id ищутся ещё и в архиве
+        with self.assertNumQueries(2):
+            data = self.get_json(reverse('api:posts_by_id'), fields='id',
+                                 ids=','.join(map(str, ids)))
+        self.assertEquals(data, {
+            'results': [{'id': ids[0]}, {'id': ids[2]}],
+            'missing': [0],
+        })
+
+    def test_errors(self):
+        cases = (
+            (reverse('api:index'), {'fields': 'password'}, 400),
+            (reverse('api:posts_by_id'), {'ids': 'x'}, 400),
+            (reverse('api:post', args=[0]), {}, 404),
+            (reverse('api:group_posts', args=['nope']), {}, 404),
+        )
+        for url, params, status in cases:
+            with self.subTest(url=url, params=params):
+                self.assertIn('error', self.get_json(url, status, **params))
+
+    def test_unchanged_feed_is_not_modified(self):
+        url = reverse('api:index')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 304)
@@ -0,0 +1,15 @@
+from django.urls import path
+
+from . import views
+
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.index_feed, name='index'),
+    path('posts/multi/', views.posts_by_id, name='posts_by_id'),
+    path('posts/<int:post_id>/', views.post_detail, name='post'),
+    path('groups/<slug:slug>/posts/', views.group_feed, name='group_posts'),
+    path('authors/<str:username>/posts/', views.author_feed,
+         name='author_posts'),
+]
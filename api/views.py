@@ -0,0 +1,111 @@
+from django.http import JsonResponse
+from django.views.decorators.http import etag, require_GET
+
+from posts.conditional import (find_author_id, find_group_id, first_value,
+                               group_etag, index_etag, profile_etag)
+from posts.models import ArchivedPost, Post
+from posts.paginators import KeysetPaginator
+from yatube.settings import API_MAX_IDS, TEN_POSTS
+
+from .serializers import parse_fields, select_fields, serialize_post
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={
+        'ensure_ascii': False, 'separators': (',', ':'),
+    })
+
+
+def error(message, status=400):
+    return json_response({'error': message}, status=status)
+
+
+def feed_response(request, posts, archived):
+    fields = parse_fields(request.GET.get('fields'))
+    if fields is None:
+        return error('Unknown field in fields=')
+    paginator = KeysetPaginator(select_fields(posts, fields), TEN_POSTS,
+                                archive=select_fields(archived, fields))
+    page = paginator.get_cursor_page(after=request.GET.get('after'),
+                                     before=request.GET.get('before'))
+    return json_response({
+        'results': [serialize_post(post, fields) for post in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+@require_GET
+@etag(index_etag)
+def index_feed(request):
+    return feed_response(request, Post.objects.all(),
+                         ArchivedPost.objects.all())
+
+
+@require_GET
+@etag(group_etag)
+def group_feed(request, slug):
+    group_id = find_group_id(request, slug)
+    if group_id is None:
+        return error('Group not found', status=404)
+    return feed_response(request, Post.objects.filter(group_id=group_id),
+                         ArchivedPost.objects.filter(group_id=group_id))
+
+
+@require_GET
+@etag(profile_etag)
+def author_feed(request, username):
+    author_id = find_author_id(request, username)
+    if author_id is None:
+        return error('Author not found', status=404)
+    return feed_response(request, Post.objects.filter(author_id=author_id),
+                         ArchivedPost.objects.filter(author_id=author_id))
+
+
+@require_GET
+def post_detail(request, post_id):
+    fields = parse_fields(request.GET.get('fields'))
+    if fields is None:
+        return error('Unknown field in fields=')
+    for model in (Post, ArchivedPost):
+        post = first_value(select_fields(model.objects.filter(pk=post_id),
+                                         fields))
+        if post is not None:
+            break
+    if post is None:
+        return error('Post not found', status=404)
+    return json_response(serialize_post(post, fields))
+
+
+@require_GET
+def posts_by_id(request):
+    """Несколько постов одним запросом: `?ids=1,2,3`.
+
+    Посты возвращаются в порядке `ids`; ненайденные перечисляются
+    в `missing`.
+    """
+    fields = parse_fields(request.GET.get('fields'))
+    if fields is None:
+        return error('Unknown field in fields=')
+    try:
+        ids = [int(value) for value in request.GET.get('ids', '').split(',')
+               if value.strip()]
+    except ValueError:
+        return error('ids= must be a comma-separated list of integers')
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return error('ids= is required')
+    if len(ids) > API_MAX_IDS:
+        return error(f'At most {API_MAX_IDS} ids per request')
+    posts = select_fields(Post.objects.filter(pk__in=ids), fields).order_by()
+    found = {post.pk: post for post in posts}
+    missing = [pk for pk in ids if pk not in found]
+    if missing:
+        archived = select_fields(ArchivedPost.objects.filter(pk__in=missing),
+                                 fields).order_by()
+        found.update((post.pk, post) for post in archived)
+    return json_response({
+        'results': [serialize_post(found[pk], fields)
+                    for pk in ids if pk in found],
+        'missing': [pk for pk in ids if pk not in found],
+    })
@@ -1,6 +1,53 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from django.http import HttpResponseRedirect
+from django.urls import reverse
 
-from .models import Post, Group
+from .deletion import delete_group, delete_user
+from .jobs import enqueue
+from .models import Group, Job, Post, User
+from .search import filter_by_text
+
+
+class BatchedDeleteMixin:
+    """Удаление из админки пачками в фоновой задаче.
+
+    Стандартное удаление загружает все связанные посты разом и держит
+    блокировку базы до конца, поэтому и действие, и кнопка «Удалить» на
+    странице объекта только ставят задачу в очередь.
+    """
+
+    delete_job = None
+    actions = ['delete_in_batches']
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_deleted_objects(self, objs, request):
+        # Без Collector: связанные строки перечислит и удалит задача.
+        return [str(obj) for obj in objs], {}, set(), []
+
+    def delete_model(self, request, obj):
+        self.delete_in_batches(request, self.model.objects.filter(pk=obj.pk))
+
+    def response_delete(self, request, obj_display, obj_id):
+        opts = self.model._meta
+        return HttpResponseRedirect(reverse(
+            f'admin:{opts.app_label}_{opts.model_name}_changelist',
+            current_app=self.admin_site.name,
+        ))
+
+    def delete_in_batches(self, request, queryset):
+        queued = 0
+        for pk in queryset.values_list('pk', flat=True):
+            key = f'{self.delete_job.job_name}:{pk}'
+            if enqueue(self.delete_job, pk, key=key) is not None:
+                queued += 1
+        self.message_user(request, f'Поставлено в очередь на удаление: '
+                                   f'{queued}')
+    delete_in_batches.short_description = 'Удалить пачками в фоне'
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -9,12 +56,43 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return filter_by_text(queryset, search_term), False
 
-class GroupAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'title', 'slug', 'description')
+
+class GroupAdmin(BatchedDeleteMixin, admin.ModelAdmin):
+    delete_job = staticmethod(delete_group)
+
+    list_display = ('pk', 'title', 'slug', 'description', 'posts_count')
     search_fields = ('title',)
     list_filter = ('slug',)
 
 
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'status', 'attempts', 'run_at',
+                    'duration')
+    list_filter = ('status', 'name')
+    search_fields = ('key',)
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(Job, JobAdmin)
+
+
+class BatchedDeleteUserAdmin(BatchedDeleteMixin, UserAdmin):
+    delete_job = staticmethod(delete_user)
+
+    def delete_in_batches(self, request, queryset):
+        # Пользователь не должен писать, пока задача ждёт в очереди.
+        for user in queryset.filter(is_active=True):
+            user.is_active = False
+            user.save(update_fields=['is_active'])
+        super().delete_in_batches(request, queryset)
+    delete_in_batches.short_description = 'Удалить пачками в фоне'
+
+
+admin.site.unregister(User)
+admin.site.register(User, BatchedDeleteUserAdmin)
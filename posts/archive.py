@@ -0,0 +1,108 @@
+"""Перенос старых постов в архивную таблицу и чтение из неё.
+
+Почти все запросы читают свежие страницы лент, поэтому в `posts_post`
+остаются посты за последние POST_ARCHIVE_AFTER_DAYS дней, а более старые
+лежат в `posts_archivedpost` с теми же id. Ленты и страница поста
+обращаются к архиву, только если в рабочей таблице нужного не нашлось,
+так что рабочая таблица и её индексы помещаются в кеш страниц.
+"""
+import calendar
+from datetime import datetime, timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from .decorators import retry_on_locked
+from .jobs import enqueue
+from .models import ArchivedPost, Post, TimelineEntry
+from .timeline import fan_out_post
+from yatube.settings import POST_ARCHIVE_AFTER_DAYS
+
+
+POST_TABLE = Post._meta.db_table
+ARCHIVE_TABLE = ArchivedPost._meta.db_table
+COLUMNS = ', '.join(field.column
+                    for field in ArchivedPost._meta.concrete_fields)
+
+
+@retry_on_locked
+def archive_batch(cutoff, batch_size):
+    """Перенести в архив до `batch_size` постов старше `cutoff`."""
+    ids = list(Post.objects.filter(pub_date__lt=cutoff)
+               .order_by('pub_date', 'pk')
+               .values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {ARCHIVE_TABLE} ({COLUMNS}) '
+                       f'SELECT {COLUMNS} FROM {POST_TABLE} '
+                       f'WHERE id IN ({placeholders})', ids)
+        # Лента подписок ссылается на рабочую таблицу; архивные посты
+        # подмешивает TimelinePaginator.
+        TimelineEntry.objects.filter(post_id__in=ids).delete()
+        # Мимо сигналов: счётчики учитывают и архив, а полнотекстовый
+        # индекс привязан к id, которые не меняются.
+        cursor.execute(f'DELETE FROM {POST_TABLE} '
+                       f'WHERE id IN ({placeholders})', ids)
+    return len(ids)
+
+
+@retry_on_locked
+def restore_post(post_id):
+    """Вернуть пост из архива в рабочую таблицу, например для правки."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {POST_TABLE} ({COLUMNS}) '
+                       f'SELECT {COLUMNS} FROM {ARCHIVE_TABLE} '
+                       f'WHERE id = %s', [post_id])
+        cursor.execute(f'DELETE FROM {ARCHIVE_TABLE} WHERE id = %s',
+                       [post_id])
+    # Записи ленты подписок удалялись при переносе в архив.
+    enqueue(fan_out_post, post_id)
+    return Post.objects.select_related('author', 'group').get(pk=post_id)
+
+
+def archive_posts(days=POST_ARCHIVE_AFTER_DAYS, batch_size=500):
+    """Перенести в архив посты старше `days` дней; вернуть их число."""
+    cutoff = timezone.now() - timedelta(days=days)
+    done = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return done
+        done += moved
+
+
+def find_post(select_related=(), **lookups):
+    """Пост из рабочей таблицы, а если его там нет — из архива."""
+    for model in (Post, ArchivedPost):
+        posts = model.objects.select_related(*select_related).filter(
+            **lookups).order_by()
+        post = next(iter(posts[:1]), None)
+        if post is not None:
+            return post
+    return None
+
+
+def month_range(year, month=None):
+    """Границы месяца или года в текущем часовом поясе.
+
+    ValueError, если такой даты нет.
+    """
+    if month is None:
+        start, end = datetime(year, 1, 1), datetime(year, 12, 31)
+    else:
+        last_day = calendar.monthrange(year, month)[1]
+        start, end = datetime(year, month, 1), datetime(year, month, last_day)
+    end += timedelta(days=1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def months_with_posts(posts, archived):
+    """Месяцы, в которых есть посты рабочей или архивной выборки."""
+    tzinfo = timezone.get_current_timezone()
+    months = set()
+    for queryset in (posts, archived):
+        months.update(queryset.order_by().datetimes('pub_date', 'month',
+                                                    tzinfo=tzinfo))
+    return sorted(months)
@@ -0,0 +1,54 @@
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .cache import author_feed, bump_feed_version, group_feed, index_feed
+from .models import AuthorStats, Group, Post
+
+
+@contextmanager
+def explicit_pub_date():
+    """Позволяет сохранять посты с заранее заданной датой публикации."""
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def safe_batch_size(model, batch_size):
+    # Django 2.2 не уменьшает явно заданный batch_size до пределов
+    # SQLite на число параметров запроса.
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+    return min(batch_size,
+               connection.ops.bulk_batch_size(fields, [None] * batch_size))
+
+
+def apply_post_counts(posts, sign=1):
+    """Обновить счётчики и версии лент после массовой вставки/удаления.
+
+    `bulk_create` и `QuerySet.delete()` по сырым id не отправляют
+    сигналы, поэтому вызывающий код передаёт сюда затронутые посты.
+    """
+    authors = Counter(post.author_id for post in posts)
+    groups = Counter(post.group_id for post in posts
+                     if post.group_id is not None)
+    for author_id, count in authors.items():
+        if sign > 0:
+            AuthorStats.add_posts(author_id, count)
+        else:
+            # Разошедшийся счётчик не должен уйти ниже нуля.
+            AuthorStats.objects.filter(user_id=author_id).update(
+                posts_count=Greatest(F('posts_count') - count, 0))
+    for group_id, count in groups.items():
+        Group.objects.filter(pk=group_id).update(
+            posts_count=Greatest(F('posts_count') + sign * count, 0))
+    bump_feed_version(
+        index_feed(),
+        *(author_feed(author_id) for author_id in authors),
+        *(group_feed(group_id) for group_id in groups),
+    )
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from django.core.cache import caches
+
+from yatube.settings import FEED_CACHE_ALIAS, FEED_CACHE_TIMEOUT
+
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def feed_cache():
+    return caches[FEED_CACHE_ALIAS]
+
+
+def index_feed():
+    return 'index'
+
+
+def group_feed(group_id):
+    return f'group:{group_id}'
+
+
+def author_feed(author_id):
+    return f'author:{author_id}'
+
+
+def _version_key(feed):
+    return f'feed-version:{feed}'
+
+
+def get_feed_version(feed):
+    cache = feed_cache()
+    version = cache.get(_version_key(feed))
+    if version is None:
+        # Если версия вытеснена из кеша, новая не должна совпасть ни с
+        # одной из прежних, поэтому начинаем с текущего времени.
+        cache.add(_version_key(feed), int(time.time() * 1000), None)
+        version = cache.get(_version_key(feed))
+    return version
+
+
+def bump_feed_version(*feeds):
+    cache = feed_cache()
+    for feed in feeds:
+        try:
+            cache.incr(_version_key(feed))
+        except ValueError:
+            get_feed_version(feed)
+
+
+def fragment_key(feed, cursor_key, vary_on=()):
+    parts = [feed, str(get_feed_version(feed)), cursor_key]
+    parts.extend(str(value) for value in vary_on)
+    return 'feed-fragment:' + ':'.join(parts)
+
+
+def get_fragment(key):
+    fragment = feed_cache().get(key)
+    with _stats_lock:
+        _stats['hits' if fragment is not None else 'misses'] += 1
+    return fragment
+
+
+def set_fragment(key, fragment):
+    feed_cache().set(key, fragment, FEED_CACHE_TIMEOUT)
+
+
+def feed_cache_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_feed_cache_stats():
+    with _stats_lock:
+        _stats.update(hits=0, misses=0)
@@ -0,0 +1,86 @@
+"""Валидаторы для условных GET-запросов к лентам и страницам постов.
+
+Ленты сравниваются по версии из кеша фрагментов: она меняется при
+любом сохранении или удалении поста ленты. Страница поста — по времени
+его изменения и версии ленты автора, от которой зависит карточка
+автора. Вычисление валидатора стоит не больше одного запроса по индексу.
+"""
+import hashlib
+
+from .cache import author_feed, get_feed_version, group_feed, index_feed
+from .groups import get_group
+from .models import ArchivedPost, Post, User
+
+
+def first_value(queryset):
+    return next(iter(queryset.order_by()[:1]), None)
+
+
+def make_etag(request, *parts):
+    # Шапка страницы зависит от пользователя, а список — от курсора.
+    parts = (*parts, request.user.pk or 0, request.get_full_path())
+    raw = ':'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def index_etag(request):
+    return make_etag(request, get_feed_version(index_feed()))
+
+
+def memoized(request, name, queryset):
+    # Валидатор и сам view ищут одну и ту же строку; второй раз
+    # значение берётся из запроса.
+    attr = f'_{name}'
+    if not hasattr(request, attr):
+        setattr(request, attr, first_value(queryset))
+    return getattr(request, attr)
+
+
+def find_group_id(request, slug):
+    group = get_group(slug=slug)
+    return group.pk if group is not None else None
+
+
+def find_author_id(request, username):
+    return memoized(request, 'author_id', User.objects.filter(
+        username=username).values_list('pk', flat=True))
+
+
+def group_etag(request, slug):
+    group_id = find_group_id(request, slug)
+    if group_id is None:
+        return None
+    return make_etag(request, get_feed_version(group_feed(group_id)))
+
+
+def profile_etag(request, username):
+    author_id = find_author_id(request, username)
+    if author_id is None:
+        return None
+    return make_etag(request, get_feed_version(author_feed(author_id)))
+
+
+def post_validator(request, username, post_id):
+    # Архив проверяется, только если поста нет в рабочей таблице.
+    for name, model in (('post', Post), ('archived_post', ArchivedPost)):
+        validator = memoized(
+            request, f'{name}_validator', model.objects.filter(
+                pk=post_id, author__username=username,
+            ).values_list('modified', 'author_id'))
+        if validator is not None:
+            return validator
+    return None
+
+
+def post_etag(request, username, post_id):
+    validator = post_validator(request, username, post_id)
+    if validator is None:
+        return None
+    modified, author_id = validator
+    return make_etag(request, post_id, modified.isoformat(),
+                     get_feed_version(author_feed(author_id)))
+
+
+def post_last_modified(request, username, post_id):
+    validator = post_validator(request, username, post_id)
+    return validator[0] if validator else None
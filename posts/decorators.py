@@ -0,0 +1,39 @@
+import random
+import time
+from functools import wraps
+
+from django.db import OperationalError, connection, transaction
+
+
+def is_locked_error(error):
+    message = str(error)
+    return any(text in message for text in (
+        'database is locked', 'database is busy', 'database table is locked',
+    ))
+
+
+def retry_on_locked(func=None, *, attempts=5, backoff=0.05):
+    """Выполнить функцию в транзакции, повторяя её, если база занята.
+
+    Между попытками пауза растёт экспоненциально со случайным разбросом,
+    чтобы конкурирующие писатели не просыпались одновременно. Внутри уже
+    открытой транзакции повтор бессмыслен, поэтому ошибка пробрасывается.
+    """
+    if func is None:
+        return lambda func: retry_on_locked(func, attempts=attempts,
+                                            backoff=backoff)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if connection.in_atomic_block:
+            return func(*args, **kwargs)
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as error:
+                if not is_locked_error(error) or attempt == attempts - 1:
+                    raise
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    return wrapper
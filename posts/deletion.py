@@ -0,0 +1,161 @@
+"""Пакетное удаление пользователей и сообществ.
+
+Обычное удаление загружает через Collector все связанные посты, шлёт
+сигналы для каждой строки и всё это время держит блокировку записи
+SQLite. Здесь связанные строки удаляются пачками по DELETE_BATCH_SIZE,
+каждая в своей короткой транзакции, а счётчики и версии лент
+обновляются после каждой пачки. Каждая пачка выбирает то, что ещё
+осталось, поэтому прерванное удаление продолжается повторным запуском.
+"""
+import logging
+from collections import Counter
+
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .bulk import apply_post_counts
+from .cache import author_feed, bump_feed_version, group_feed, index_feed
+from .decorators import retry_on_locked
+from .jobs import job
+from .models import (ArchivedPost, AuthorStats, Follow, Group, Post,
+                     TimelineEntry, User)
+from .search import unindex_posts
+from .timeline import update_pulled
+from yatube.settings import DELETE_BATCH_SIZE
+
+
+logger = logging.getLogger(__name__)
+
+
+def _delete_rows(model, ids):
+    # Мимо Collector и сигналов: производные данные обновляет вызывающий.
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {model._meta.db_table} '
+                       f'WHERE id IN ({placeholders})', ids)
+
+
+@retry_on_locked
+def delete_posts_batch(model, batch_size, **lookups):
+    posts = list(model.objects.filter(**lookups).order_by('pk')
+                 .only('author', 'group')[:batch_size])
+    if not posts:
+        return 0
+    ids = [post.pk for post in posts]
+    TimelineEntry.objects.filter(post_id__in=ids).delete()
+    unindex_posts(ids)
+    _delete_rows(model, ids)
+    apply_post_counts(posts, sign=-1)
+    return len(ids)
+
+
+@retry_on_locked
+def delete_follows_batch(user_id, batch_size):
+    follows = list(
+        Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id))
+        .order_by('pk').values_list('pk', 'user_id', 'author_id')[:batch_size]
+    )
+    if not follows:
+        return 0
+    _delete_rows(Follow, [pk for pk, _, _ in follows])
+    # Пара подписчик–автор уникальна, поэтому каждый счётчик
+    # уменьшается ровно на единицу.
+    authors = [author for _, user, author in follows if user == user_id]
+    readers = [user for _, user, author in follows if author == user_id]
+    AuthorStats.objects.filter(
+        user_id__in=authors, followers_count__gt=0,
+    ).update(followers_count=F('followers_count') - 1)
+    AuthorStats.objects.filter(
+        user_id__in=readers, following_count__gt=0,
+    ).update(following_count=F('following_count') - 1)
+    update_pulled(authors)
+    bump_feed_version(*(author_feed(pk) for pk in {*authors, *readers}))
+    return len(follows)
+
+
+@retry_on_locked
+def delete_timeline_batch(user_id, batch_size):
+    ids = list(TimelineEntry.objects.filter(user_id=user_id).order_by('pk')
+               .values_list('pk', flat=True)[:batch_size])
+    if ids:
+        TimelineEntry.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+@retry_on_locked
+def detach_posts_batch(model, group_id, batch_size):
+    posts = list(model.objects.filter(group_id=group_id).order_by('pk')
+                 .values_list('pk', 'author_id')[:batch_size])
+    if not posts:
+        return 0
+    # update() не трогает auto_now, а от modified зависит ETag поста.
+    model.objects.filter(pk__in=[pk for pk, _ in posts]).update(
+        group=None, modified=timezone.now())
+    Group.objects.filter(pk=group_id, posts_count__gte=len(posts)).update(
+        posts_count=F('posts_count') - len(posts))
+    bump_feed_version(index_feed(), group_feed(group_id),
+                      *{author_feed(author_id) for _, author_id in posts})
+    return len(posts)
+
+
+def run_stages(stages, progress=None):
+    """Выполнять пачки каждого этапа, пока они не опустеют.
+
+    `progress(stage, done)` вызывается после каждой пачки.
+    """
+    done = Counter()
+    for stage, batch in stages:
+        while True:
+            count = batch()
+            if not count:
+                break
+            done[stage] += count
+            if progress is not None:
+                progress(stage, done[stage])
+    return done
+
+
+@job(max_attempts=10)
+def delete_user(user_id, batch_size=DELETE_BATCH_SIZE, progress=None):
+    """Удалить пользователя вместе с постами и подписками пачками.
+
+    Пока идёт удаление, пользователь не может войти.
+    """
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return Counter()
+    if user.is_active:
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+    done = run_stages([
+        ('follows', lambda: delete_follows_batch(user_id, batch_size)),
+        ('timeline', lambda: delete_timeline_batch(user_id, batch_size)),
+        ('posts', lambda: delete_posts_batch(
+            Post, batch_size, author_id=user_id)),
+        ('archived_posts', lambda: delete_posts_batch(
+            ArchivedPost, batch_size, author_id=user_id)),
+    ], progress)
+    # Связанных строк почти не осталось, Collector справится быстро.
+    user.delete()
+    logger.info('User %s deleted: %s', user_id, dict(done))
+    return done
+
+
+@job(max_attempts=10)
+def delete_group(group_id, batch_size=DELETE_BATCH_SIZE, progress=None):
+    """Удалить сообщество, отвязывая его посты пачками.
+
+    Посты остаются у авторов, как и при `on_delete=SET_NULL`.
+    """
+    group = Group.objects.filter(pk=group_id).first()
+    if group is None:
+        return Counter()
+    done = run_stages([
+        ('posts', lambda: detach_posts_batch(Post, group_id, batch_size)),
+        ('archived_posts', lambda: detach_posts_batch(
+            ArchivedPost, group_id, batch_size)),
+    ], progress)
+    group.delete()
+    logger.info('Group %s deleted: %s', group_id, dict(done))
+    return done
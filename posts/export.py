@@ -0,0 +1,71 @@
+import csv
+import heapq
+import json
+
+from .paginators import KeysetPaginator, decode_cursor, encode_cursor
+
+
+EXPORT_FIELDS = (
+    'id', 'pub_date', 'text',
+    'author', 'author_first_name', 'author_last_name',
+    'group', 'group_title', 'cursor',
+)
+EXPORT_COLUMNS = (
+    'pk', 'pub_date', 'text',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__slug', 'group__title',
+)
+CHUNK_SIZE = 2000
+
+
+def _select_rows(posts, cursor):
+    paginator = KeysetPaginator(posts, CHUNK_SIZE)
+    if cursor is not None:
+        posts = paginator.older_than(*cursor)
+    else:
+        posts = paginator.object_list
+    return posts.values_list(*EXPORT_COLUMNS).iterator(chunk_size=CHUNK_SIZE)
+
+
+def export_rows(posts, after=None, archived=None):
+    """Построчно выдать посты ленты от новых к старым.
+
+    Каждая строка содержит курсор, по которому можно продолжить выгрузку
+    с того же места, если соединение оборвалось. Посты из архива
+    (`archived`) сливаются с рабочими по тому же ключу (pub_date, id),
+    поэтому курсор работает и на границе таблиц.
+    """
+    cursor = decode_cursor(after)
+    streams = [_select_rows(posts, cursor)]
+    if archived is not None:
+        streams.append(_select_rows(archived, cursor))
+    rows = heapq.merge(*streams, key=lambda row: (row[1], row[0]),
+                       reverse=True)
+    for row in rows:
+        row = dict(zip(EXPORT_FIELDS, row))
+        row['cursor'] = encode_cursor(row['pub_date'], row['id'])
+        row['pub_date'] = row['pub_date'].isoformat()
+        yield row
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
@@ -1,13 +1,48 @@
 from django import forms
+from django.urls import reverse_lazy
 
+from .groups import get_group
 from .models import Post
 
 
+class GroupAutocompleteWidget(forms.Select):
+    """Выбор сообщества с подсказками по началу названия.
+
+    В разметку попадают только пустой вариант и выбранное сообщество,
+    остальные подгружает скрипт, поэтому форма не перебирает все
+    сообщества из базы.
+    """
+
+    class Media:
+        js = ('posts/group_autocomplete.js',)
+
+    def __init__(self, attrs=None):
+        attrs = {'data-autocomplete-url': reverse_lazy(
+            'group_autocomplete'), **(attrs or {})}
+        super().__init__(attrs)
+
+    def optgroups(self, name, value, attrs=None):
+        all_choices = self.choices
+        self.choices = [('', all_choices.field.empty_label)]
+        for pk in value:
+            group = get_group(pk=pk) if str(pk).isdigit() else None
+            if group is not None:
+                self.choices.append((group.pk, group.title))
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = all_choices
+
+
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
-        fields = ('group', 'text')
+        fields = ('group', 'text', 'image')
         labels = {
             'text': 'Текст',
             'group': 'Группа',
+            'image': 'Картинка',
+        }
+        widgets = {
+            'group': GroupAutocompleteWidget,
         }
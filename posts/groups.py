@@ -0,0 +1,78 @@
+"""Кеш сообществ по slug и id и поиск сообществ по началу названия.
+
+Сообщество ищется сначала в памяти процесса, затем в общем кеше и только
+потом в базе. Ключи содержат общую версию, которую увеличивает любое
+сохранение или удаление сообщества, поэтому изменения видны всем
+процессам сразу. Счётчик постов в кеш не попадает: он меняется с каждым
+постом и читается из базы при обращении.
+"""
+import hashlib
+
+from django.db import router
+
+from .cache import feed_cache, get_feed_version
+from .models import Group
+from yatube.lru import LRUCache
+from yatube.settings import (FEED_CACHE_TIMEOUT, GROUP_AUTOCOMPLETE_LIMIT,
+                             GROUP_CACHE_SIZE)
+
+
+GROUPS = 'groups'
+CACHED_FIELDS = ('id', 'title', 'slug', 'description', 'title_key')
+
+_local = LRUCache(GROUP_CACHE_SIZE, FEED_CACHE_TIMEOUT)
+
+
+def _cached(key, load):
+    value = _local.get(key)
+    if value is None:
+        value = feed_cache().get(key)
+        if value is None:
+            value = load()
+            if value is None:
+                return None
+            feed_cache().set(key, value, FEED_CACHE_TIMEOUT)
+        _local.set(key, value)
+    return value
+
+
+def get_group(slug=None, pk=None):
+    """Сообщество по slug или id; None, если такого нет."""
+    lookup, value = ('slug', slug) if pk is None else ('pk', pk)
+    version = get_feed_version(GROUPS)
+
+    def load():
+        rows = Group.objects.filter(**{lookup: value}).order_by()
+        return next(iter(rows.values_list(*CACHED_FIELDS)[:1]), None)
+
+    row = _cached(f'group:{version}:{lookup}:{value}', load)
+    if row is None:
+        return None
+    return Group.from_db(router.db_for_read(Group), CACHED_FIELDS, row)
+
+
+def autocomplete_groups(prefix):
+    """Сообщества, название которых начинается с `prefix`.
+
+    Диапазон по `title_key` читается по индексу, в отличие от LIKE,
+    который SQLite без учёта регистра по индексу не выполняет.
+    """
+    key = Group.make_title_key(prefix)
+    if not key:
+        return []
+    version = get_feed_version(GROUPS)
+    digest = hashlib.md5(key.encode()).hexdigest()
+
+    def load():
+        return list(
+            Group.objects.filter(title_key__gte=key,
+                                 title_key__lt=key + '\U0010ffff')
+            .order_by('title_key')
+            .values_list('pk', 'title', 'slug')[:GROUP_AUTOCOMPLETE_LIMIT]
+        )
+
+    return _cached(f'group-autocomplete:{version}:{digest}', load)
+
+
+def clear_local_groups():
+    _local.clear()
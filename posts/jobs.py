@@ -0,0 +1,132 @@
+"""Очередь фоновых задач в базе данных.
+
+Задача ставится в очередь в той же транзакции, что и изменение, которое
+её породило, поэтому не теряется при падении процесса и не выполняется
+для откатившихся изменений. Выполняет задачи команда `run_jobs`.
+"""
+import json
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .decorators import retry_on_locked
+from .models import Job
+from yatube.metrics import JOB_DURATION
+from yatube.settings import JOB_LOCK_TIMEOUT, JOB_RETRY_BACKOFF
+
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+
+def job(func=None, *, name=None, max_attempts=3):
+    """Зарегистрировать функцию как фоновую задачу.
+
+    Аргументы задачи должны сериализоваться в JSON.
+    """
+    if func is None:
+        return lambda func: job(func, name=name, max_attempts=max_attempts)
+    func.job_name = name or f'{func.__module__}.{func.__qualname__}'
+    func.max_attempts = max_attempts
+    REGISTRY[func.job_name] = func
+    return func
+
+
+def enqueue(func, *args, key=None, delay=0):
+    """Поставить задачу в очередь.
+
+    Если задан `key` и задача с таким ключом уже есть, новая не ставится:
+    так повторное сохранение не порождает одинаковую работу.
+    """
+    fields = {
+        'name': func.job_name,
+        'args': json.dumps(args),
+        'max_attempts': func.max_attempts,
+        'run_at': timezone.now() + timedelta(seconds=delay),
+    }
+    if key is None:
+        return Job.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Job.objects.create(key=key, **fields)
+    except IntegrityError:
+        return None
+
+
+@retry_on_locked
+def claim_job():
+    """Взять в работу одну готовую к выполнению задачу или вернуть None."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=JOB_LOCK_TIMEOUT)
+    candidates = Job.objects.filter(
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_at__lt=stale),
+    ).order_by('run_at').values_list('pk', 'status', 'locked_at')[:10]
+    for pk, status, locked_at in candidates:
+        # Условие на прежнее состояние не даёт двум обработчикам
+        # взять одну задачу.
+        claimed = Job.objects.filter(
+            pk=pk, status=status, locked_at=locked_at,
+        ).update(status=Job.RUNNING, locked_at=now,
+                 attempts=F('attempts') + 1)
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+@retry_on_locked
+def finish_job(job, **fields):
+    Job.objects.filter(pk=job.pk).update(**fields)
+
+
+def run_job(job):
+    """Выполнить взятую задачу и записать результат."""
+    func = REGISTRY.get(job.name)
+    if func is None:
+        finish_job(job, status=Job.FAILED, finished_at=timezone.now(),
+                   last_error=f'Unknown job {job.name}')
+        return False
+    if job.attempts > job.max_attempts:
+        # Обработчик падал на этой задаче, не успев записать результат.
+        finish_job(job, status=Job.FAILED, finished_at=timezone.now())
+        return False
+
+    start = time.perf_counter()
+    try:
+        func(*json.loads(job.args))
+    except Exception:
+        duration = time.perf_counter() - start
+        JOB_DURATION.observe(job.name, duration)
+        logger.exception('Job %s (%s) failed', job.pk, job.name)
+        fields = {'duration': duration, 'last_error': traceback.format_exc()}
+        if job.attempts < job.max_attempts:
+            delay = JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            finish_job(job, status=Job.QUEUED, locked_at=None,
+                       run_at=timezone.now() + timedelta(seconds=delay),
+                       **fields)
+        else:
+            finish_job(job, status=Job.FAILED, finished_at=timezone.now(),
+                       **fields)
+        return False
+    duration = time.perf_counter() - start
+    JOB_DURATION.observe(job.name, duration)
+    finish_job(job, status=Job.DONE, finished_at=timezone.now(),
+               duration=duration, last_error='')
+    return True
+
+
+def run_pending():
+    """Выполнить в текущем потоке все готовые задачи; вернуть их число."""
+    done = 0
+    while True:
+        job = claim_job()
+        if job is None:
+            return done
+        run_job(job)
+        done += 1
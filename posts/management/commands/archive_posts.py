@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_posts
+from yatube.settings import POST_ARCHIVE_AFTER_DAYS
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты в архивную таблицу'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=POST_ARCHIVE_AFTER_DAYS,
+                            help='Переносить посты старше стольких дней')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Сколько постов за транзакцию')
+
+    def handle(self, *args, **options):
+        count = archive_posts(options['days'],
+                              batch_size=options['batch_size'])
+        self.stdout.write(f'Перенесено в архив постов: {count}')
@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Group, Post, User
+from posts.paginators import KeysetPaginator
+from posts.rendering import render_post
+from yatube.settings import TEN_POSTS
+
+
+class Command(BaseCommand):
+    help = 'Печатает план и время запросов лент на текущих данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Сколько постов добавить перед замером')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Сколько раз выполнить каждый запрос')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'])
+
+        author = User.objects.order_by('-posts__pub_date').first()
+        group = Group.objects.order_by('-posts__pub_date').first()
+        feeds = {'index': Post.objects.all()}
+        if group is not None:
+            feeds['group_posts'] = group.posts.all()
+        if author is not None:
+            feeds['profile'] = author.posts.all()
+
+        for name, posts in feeds.items():
+            paginator = KeysetPaginator(
+                posts.select_related('author', 'group'), TEN_POSTS)
+            queries = {'first page': paginator.object_list[:TEN_POSTS + 1]}
+            deepest = posts.order_by('pub_date', 'pk').first()
+            if deepest is not None:
+                queries['deep page'] = paginator.older_than(
+                    deepest.pub_date, deepest.pk + 1)[:TEN_POSTS + 1]
+            for label, queryset in queries.items():
+                self.report(f'{name}, {label}', queryset, options['repeat'])
+
+    def report(self, title, queryset, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(queryset.explain())
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        self.stdout.write(
+            f'min {timings[0] * 1000:.2f} ms, '
+            f'median {timings[len(timings) // 2] * 1000:.2f} ms, '
+            f'max {timings[-1] * 1000:.2f} ms\n'
+        )
+
+    @transaction.atomic
+    def seed(self, count):
+        author, _ = User.objects.get_or_create(username='benchmark')
+        group, _ = Group.objects.get_or_create(
+            slug='benchmark',
+            defaults={'title': 'Benchmark', 'description': 'Benchmark'},
+        )
+        Post.objects.bulk_create(
+            (render_post(Post(text=f'Benchmark post {i}', author=author,
+                              group=group if i % 2 else None))
+             for i in range(count)),
+            batch_size=500,
+        )
+        self.stdout.write(f'Добавлено постов: {count}')
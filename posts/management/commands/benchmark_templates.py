@@ -0,0 +1,84 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.utils import timezone
+
+from posts.models import Group, Post, User
+from posts.paginators import KeysetPage, KeysetPaginator
+from posts.rendering import render_post
+
+
+LISTS = {
+    'index': 'index.html',
+    'group': 'group.html',
+    'profile': 'profile.html',
+}
+
+
+class StaticPaginator(KeysetPaginator):
+    """Отдаёт заранее собранные посты, не обращаясь к базе."""
+
+    def __init__(self, posts):
+        super().__init__(Post.objects.none(), len(posts))
+        self.posts = posts
+
+    def fetch(self, after, before):
+        return self.posts, True, True
+
+
+class Command(BaseCommand):
+    help = ('Замеряет отрисовку лент из 10, 50 и 200 постов без обращения '
+            'к базе, чтобы отделить цену шаблонов от цены запросов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[10, 50, 200])
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        author = User(pk=1, username='author', first_name='Имя',
+                      last_name='Фамилия')
+        group = Group(pk=1, title='Группа', slug='group',
+                      description='Описание')
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+
+        for size in options['sizes']:
+            posts = self.make_posts(size, author, group)
+            page = KeysetPage(StaticPaginator(posts))
+            context = {
+                'page': page,
+                'author': author,
+                'group': group,
+                'posts_count': size,
+                'is_author': False,
+            }
+            for name, template_name in LISTS.items():
+                template = get_template(template_name)
+                timings = []
+                for _ in range(options['repeat']):
+                    # Уникальный ключ ленты, чтобы кеш фрагментов
+                    # не подменял отрисовку.
+                    context['feed'] = f'benchmark:{time.perf_counter()}'
+                    start = time.perf_counter()
+                    template.render(context, request)
+                    timings.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f'{name:8} {size:4} постов: '
+                    f'медиана {statistics.median(timings) * 1000:.2f} мс, '
+                    f'мин {min(timings) * 1000:.2f} мс')
+
+    def make_posts(self, size, author, group):
+        now = timezone.now()
+        return [
+            render_post(Post(
+                pk=n, text=f'Пост номер {n}\nВторая строка поста.',
+                author=author, group=group,
+                pub_date=now - timedelta(minutes=n)))
+            for n in range(1, size + 1)
+        ]
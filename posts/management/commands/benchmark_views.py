@@ -0,0 +1,248 @@
+import json
+import math
+import threading
+import time
+import tracemalloc
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import (HTTPCookieProcessor, HTTPRedirectHandler, Request,
+                            build_opener)
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.cache import feed_cache
+from posts.models import AuthorStats, Group, Post, User
+
+
+VIEWS = ('index', 'group_posts', 'profile', 'post', 'new_post')
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[max(0, rank - 1)]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class CountingApplication:
+    """WSGI-приложение, сообщающее число запросов к базе в заголовке."""
+
+    header = 'X-Benchmark-Queries'
+
+    def __init__(self, application):
+        self.application = application
+
+    def __call__(self, environ, start_response):
+        counter = QueryCounter()
+
+        def counting_start_response(status, headers, exc_info=None):
+            headers.append((self.header, str(counter.count)))
+            return start_response(status, headers, exc_info)
+
+        with connection.execute_wrapper(counter):
+            return self.application(environ, counting_start_response)
+
+
+class NoRedirectHandler(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class TestClientDriver:
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+
+    def request(self, method, url, data=None):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            if method == 'POST':
+                response = self.client.post(url, data)
+            else:
+                response = self.client.get(url)
+        return response.status_code, counter.count
+
+    def close(self):
+        pass
+
+
+class ServerDriver:
+    def __init__(self, user):
+        self.server = make_server(
+            '127.0.0.1', 0, CountingApplication(get_wsgi_application()),
+            handler_class=QuietHandler)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+
+        client = Client()
+        client.force_login(user)
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies),
+                                   NoRedirectHandler())
+        self.session_cookie = '; '.join(
+            f'{name}={morsel.value}'
+            for name, morsel in client.cookies.items())
+
+    def csrf_token(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def request(self, method, url, data=None):
+        body = None
+        request = Request(self.base_url + url, method=method)
+        request.add_header('Cookie', self.session_cookie)
+        if method == 'POST':
+            if not self.csrf_token():
+                self.request('GET', url)
+            data = dict(data, csrfmiddlewaretoken=self.csrf_token())
+            body = urlencode(data).encode()
+            request.add_header(
+                'Cookie', f'{self.session_cookie}; '
+                          f'csrftoken={self.csrf_token()}')
+        try:
+            with self.opener.open(request, body) as response:
+                response.read()
+                status, headers = response.status, response.headers
+        except HTTPError as error:
+            status, headers = error.code, error.headers
+        return status, int(headers.get(CountingApplication.header, 0))
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Command(BaseCommand):
+    help = 'Замеряет задержку, число запросов и память для основных страниц'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Сколько запросов отправить на каждую '
+                                 'страницу')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--memory-requests', type=int, default=10,
+                            help='Сколько запросов повторить под '
+                                 'tracemalloc для пиковой памяти')
+        parser.add_argument('--server', action='store_true',
+                            help='Гонять запросы через локальный WSGI-сервер '
+                                 'вместо тестового клиента')
+        parser.add_argument('--cold-cache', action='store_true',
+                            help='Очищать кеш лент перед каждым запросом')
+        parser.add_argument('--views', nargs='+', choices=VIEWS,
+                            default=VIEWS)
+        parser.add_argument('--writes', action='store_true',
+                            help='Отправлять new_post методом POST')
+        parser.add_argument('--output', help='Файл для JSON с результатами')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username='benchmark')
+        targets = self.targets(user, options['writes'])
+        driver_class = ServerDriver if options['server'] else TestClientDriver
+        driver = driver_class(user)
+        try:
+            results = {
+                name: self.measure(driver, *targets[name], options)
+                for name in options['views'] if name in targets
+            }
+        finally:
+            driver.close()
+
+        report = {
+            'started': timezone.now().isoformat(),
+            'mode': 'server' if options['server'] else 'test-client',
+            'requests': options['requests'],
+            'cold_cache': options['cold_cache'],
+            'posts': Post.objects.count(),
+            'results': results,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+
+    def targets(self, user, writes):
+        post = Post.objects.select_related('author').first()
+        if post is None:
+            raise CommandError('Нет постов: сначала выполните seed_posts')
+        group = Group.objects.order_by('-posts_count').first()
+        author = (AuthorStats.objects.select_related('user')
+                  .order_by('-posts_count').first())
+        targets = {
+            'index': ('GET', reverse('index'), None),
+            'profile': ('GET', reverse('profile', args=[
+                author.user.username if author else post.author.username,
+            ]), None),
+            'post': ('GET', reverse('post', args=[
+                post.author.username, post.pk,
+            ]), None),
+            'new_post': ('GET', reverse('new_post'), None),
+        }
+        if group is not None:
+            targets['group_posts'] = (
+                'GET', reverse('group_posts', args=[group.slug]), None)
+        if writes:
+            targets['new_post'] = ('POST', reverse('new_post'),
+                                   {'text': 'Пост из бенчмарка'})
+        return targets
+
+    def measure(self, driver, method, url, data, options):
+        for _ in range(options['warmup']):
+            driver.request(method, url, data)
+
+        timings, queries, statuses = [], [], set()
+        for _ in range(options['requests']):
+            if options['cold_cache']:
+                feed_cache().clear()
+            start = time.perf_counter()
+            status, count = driver.request(method, url, data)
+            timings.append((time.perf_counter() - start) * 1000)
+            queries.append(count)
+            statuses.add(status)
+
+        tracemalloc.start()
+        try:
+            for _ in range(options['memory_requests']):
+                if options['cold_cache']:
+                    feed_cache().clear()
+                driver.request(method, url, data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'method': method,
+            'url': url,
+            'statuses': sorted(statuses),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'queries_per_request': sum(queries) / len(queries),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
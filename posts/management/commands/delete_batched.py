@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.deletion import delete_group, delete_user
+from posts.models import Group, User
+from yatube.settings import DELETE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Удаляет пользователей и сообщества пачками; прерванное '
+            'удаление продолжается повторным запуском')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', default=[],
+                            help='Имя пользователя')
+        parser.add_argument('--group', action='append', default=[],
+                            help='Slug сообщества')
+        parser.add_argument('--batch-size', type=int,
+                            default=DELETE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        targets = []
+        for username in options['user']:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'Нет пользователя {username}')
+            targets.append((delete_user, user.pk, username))
+        for slug in options['group']:
+            group = Group.objects.filter(slug=slug).first()
+            if group is None:
+                raise CommandError(f'Нет сообщества {slug}')
+            targets.append((delete_group, group.pk, slug))
+        if not targets:
+            raise CommandError('Укажите --user или --group')
+
+        for delete, pk, name in targets:
+            done = delete(pk, batch_size=options['batch_size'],
+                          progress=self.progress)
+            counts = ', '.join(f'{stage}: {count}'
+                               for stage, count in done.items())
+            self.stdout.write(f'Удалено {name} ({counts or "без записей"})')
+
+    def progress(self, stage, done):
+        if self.verbosity > 1:
+            self.stdout.write(f'  {stage}: {done}')
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import FORMATS, export_rows
+from posts.models import ArchivedPost, Group, Post, User
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты ленты в NDJSON или CSV'
+
+    def add_arguments(self, parser):
+        feed = parser.add_mutually_exclusive_group()
+        feed.add_argument('--group', help='slug группы')
+        feed.add_argument('--author', help='username автора')
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--after',
+                            help='Курсор последней выгруженной строки, '
+                                 'чтобы продолжить прерванную выгрузку')
+        parser.add_argument('--output', help='Файл; по умолчанию stdout')
+
+    def handle(self, *args, **options):
+        posts, archived = Post.objects.all(), ArchivedPost.objects.all()
+        if options['group']:
+            group = Group.objects.filter(slug=options['group']).first()
+            if group is None:
+                raise CommandError(f'Группа {options["group"]} не найдена')
+            posts, archived = group.posts.all(), group.archived_posts.all()
+        elif options['author']:
+            author = User.objects.filter(username=options['author']).first()
+            if author is None:
+                raise CommandError(f'Автор {options["author"]} не найден')
+            posts = author.posts.all()
+            archived = author.archived_posts.all()
+
+        render_lines, _ = FORMATS[options['format']]
+        lines = render_lines(export_rows(posts, after=options['after'],
+                                         archived=archived))
+        if options['output']:
+            with open(options['output'], 'w', newline='') as file:
+                file.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
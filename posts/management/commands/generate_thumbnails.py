@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Создаёт недостающие миниатюры картинок постов'
+
+    def handle(self, *args, **options):
+        posts = (Post.objects.exclude(image='').exclude(image=None)
+                 .order_by().only('image'))
+        done = 0
+        for post in posts.iterator():
+            generate_thumbnails(post.image)
+            done += 1
+        self.stdout.write(f'Обработано картинок: {done}')
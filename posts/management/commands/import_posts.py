@@ -0,0 +1,227 @@
+import csv
+import itertools
+import json
+import os
+import sys
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import apply_post_counts, explicit_pub_date, safe_batch_size
+from posts.models import Group, ImportCheckpoint, Post, User
+from posts.rendering import render_post
+from posts.search import index_posts_after
+from posts.timeline import fan_out_posts_after
+
+
+# Поля записи; в JSON каждое из них — строка или отсутствует.
+RECORD_FIELDS = ('author', 'group', 'text', 'pub_date')
+
+
+class LookupCache:
+    """Словарь «ключ → id» с ограниченным размером.
+
+    Промахи по нескольким ключам сразу догружаются одним запросом.
+    """
+
+    lookup_size = 500
+
+    def __init__(self, queryset, field, max_size):
+        self.queryset = queryset
+        self.field = field
+        self.max_size = max_size
+        self.ids = {}
+
+    def resolve(self, keys):
+        missing = [key for key in keys if key not in self.ids]
+        if not missing:
+            return
+        if len(self.ids) + len(missing) > self.max_size:
+            self.ids.clear()
+            missing = list(keys)
+        for start in range(0, len(missing), self.lookup_size):
+            found = self.queryset.filter(**{
+                f'{self.field}__in': missing[start:start + self.lookup_size],
+            })
+            self.ids.update(found.values_list(self.field, 'pk'))
+
+    def get(self, key):
+        return self.ids.get(key)
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает посты из JSONL или CSV. Поля записи: '
+            'author (username), group (slug, необязательно), text, '
+            'pub_date (ISO 8601, необязательно)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Путь к файлу или «-» для stdin')
+        parser.add_argument('--format', choices=('jsonl', 'csv'),
+                            help='По умолчанию определяется по расширению')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Сколько постов вставлять одним запросом')
+        parser.add_argument('--commit-every', type=int, default=5000,
+                            help='Сколько постов сохранять в одной транзакции')
+        parser.add_argument('--checkpoint',
+                            help='Имя контрольной точки в базе, в которой '
+                                 'запоминается номер последней сохранённой '
+                                 'записи')
+        parser.add_argument('--create-missing', action='store_true',
+                            help='Создавать неизвестных авторов и группы')
+        parser.add_argument('--cache-size', type=int, default=100000,
+                            help='Сколько авторов и групп держать в памяти')
+
+    def handle(self, *args, **options):
+        source = options['source']
+        fmt = options['format'] or ('csv' if source.endswith('.csv')
+                                    else 'jsonl')
+        self.create_missing = options['create_missing']
+        self.authors = LookupCache(User.objects.all(), 'username',
+                                   options['cache_size'])
+        self.groups = LookupCache(Group.objects.all(), 'slug',
+                                  options['cache_size'])
+        self.batch_size = safe_batch_size(Post, options['batch_size'])
+        self.errors = 0
+
+        self.checkpoint = options['checkpoint']
+        done = self.read_checkpoint()
+        if done:
+            self.stdout.write(f'Продолжаем после записи {done}')
+
+        if source != '-' and not os.path.exists(source):
+            raise CommandError(f'Файл {source} не найден')
+        stream = sys.stdin if source == '-' else open(source, newline='')
+        try:
+            records = self.read_records(stream, fmt)
+            records = itertools.islice(records, done, None)
+            imported = 0
+            with explicit_pub_date():
+                while True:
+                    chunk = list(itertools.islice(records,
+                                                  options['commit_every']))
+                    if not chunk:
+                        break
+                    done += len(chunk)
+                    imported += self.import_chunk(chunk, done)
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'Обработано записей: {done}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(f'Загружено постов: {imported}, '
+                          f'пропущено записей: {self.errors}')
+
+    def read_records(self, stream, fmt):
+        if fmt == 'csv':
+            for record in csv.DictReader(stream):
+                yield record
+            return
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            # Ошибочная запись всё равно занимает позицию, чтобы номер
+            # в контрольной точке совпадал с номером строки.
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield {'error': f'строка {line_number}: неверный JSON'}
+                continue
+            if not isinstance(record, dict):
+                yield {'error': f'строка {line_number}: не объект JSON'}
+                continue
+            field = next((field for field in RECORD_FIELDS
+                          if record.get(field) is not None
+                          and not isinstance(record[field], str)), None)
+            if field is not None:
+                yield {'error': f'строка {line_number}: поле {field} '
+                                f'должно быть строкой'}
+                continue
+            yield record
+
+    def read_checkpoint(self):
+        if not self.checkpoint:
+            return 0
+        return ImportCheckpoint.objects.filter(
+            name=self.checkpoint).values_list('done', flat=True).first() or 0
+
+    def write_checkpoint(self, done):
+        if self.checkpoint:
+            ImportCheckpoint.objects.update_or_create(
+                name=self.checkpoint, defaults={'done': done})
+
+    def skip(self, reason, record=None):
+        self.errors += 1
+        if record is None:
+            self.stderr.write(f'Пропущена запись: {reason}')
+        else:
+            self.stderr.write(f'Пропущена запись {record!r}: {reason}')
+
+    @transaction.atomic
+    def import_chunk(self, records, done):
+        """Сохранить посты пачки и контрольную точку одной транзакцией."""
+        self.resolve(records)
+        now = timezone.now()
+        posts = []
+        for record in records:
+            if 'error' in record:
+                self.skip(record['error'])
+                continue
+            author_id = self.authors.get(record.get('author'))
+            if author_id is None:
+                self.skip('неизвестный автор', record)
+                continue
+            group_id = None
+            if record.get('group'):
+                group_id = self.groups.get(record['group'])
+                if group_id is None:
+                    self.skip('неизвестная группа', record)
+                    continue
+            text = (record.get('text') or '').strip()
+            if not text:
+                self.skip('пустой текст', record)
+                continue
+            pub_date = now
+            if record.get('pub_date'):
+                pub_date = parse_datetime(record['pub_date'])
+                if pub_date is None:
+                    self.skip('неверная дата', record)
+                    continue
+                if timezone.is_naive(pub_date):
+                    pub_date = timezone.make_aware(pub_date)
+            posts.append(render_post(Post(text=text, author_id=author_id,
+                                          group_id=group_id,
+                                          pub_date=pub_date)))
+
+        last_id = Post.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+        Post.objects.bulk_create(posts, batch_size=self.batch_size)
+        index_posts_after(last_id)
+        fan_out_posts_after(last_id)
+        apply_post_counts(posts)
+        self.write_checkpoint(done)
+        return len(posts)
+
+    def resolve(self, records):
+        usernames = {r['author'] for r in records if r.get('author')}
+        slugs = {r['group'] for r in records if r.get('group')}
+        self.authors.resolve(usernames)
+        self.groups.resolve(slugs)
+        if not self.create_missing:
+            return
+
+        password = make_password(None)
+        new_users = [User(username=name, password=password)
+                     for name in usernames if self.authors.get(name) is None]
+        new_groups = [Group(title=slug, slug=slug, description='',
+                            title_key=Group.make_title_key(slug))
+                      for slug in slugs if self.groups.get(slug) is None]
+        User.objects.bulk_create(
+            new_users, batch_size=safe_batch_size(User, self.batch_size))
+        Group.objects.bulk_create(
+            new_groups, batch_size=safe_batch_size(Group, self.batch_size))
+        self.authors.resolve(usernames)
+        self.groups.resolve(slugs)
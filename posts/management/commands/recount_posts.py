@@ -0,0 +1,87 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts.models import (ArchivedPost, AuthorStats, Follow, Group, Post,
+                          User)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов у групп и авторов '
+            'и счётчики подписок')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Сколько групп или авторов за транзакцию')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fixed = 0
+        for ids in self.batches(Group.objects.all(), batch_size):
+            fixed += self.recount_groups(ids)
+        self.stdout.write(f'Исправлено групп: {fixed}')
+
+        fixed = 0
+        for ids in self.batches(User.objects.all(), batch_size):
+            fixed += self.recount_authors(ids)
+        self.stdout.write(f'Исправлено авторов: {fixed}')
+
+    def batches(self, queryset, batch_size):
+        last_pk = 0
+        while True:
+            ids = list(queryset.filter(pk__gt=last_pk).order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return
+            yield ids
+            last_pk = ids[-1]
+
+    def actual_counts(self, field, ids, model=Post):
+        return dict(
+            model.objects.filter(**{f'{field}__in': ids}).order_by()
+            .values_list(field).annotate(Count('pk'))
+        )
+
+    def post_counts(self, field, ids):
+        # Перенесённые в архив посты по-прежнему считаются.
+        counts = Counter(self.actual_counts(field, ids))
+        counts.update(self.actual_counts(field, ids, ArchivedPost))
+        return counts
+
+    @transaction.atomic
+    def recount_groups(self, ids):
+        counts = self.post_counts('group', ids)
+        fixed = 0
+        for group in Group.objects.filter(pk__in=ids).only('posts_count'):
+            count = counts.get(group.pk, 0)
+            if group.posts_count != count:
+                Group.objects.filter(pk=group.pk).update(posts_count=count)
+                fixed += 1
+        return fixed
+
+    @transaction.atomic
+    def recount_authors(self, ids):
+        actual = {
+            'posts_count': self.post_counts('author', ids),
+            'followers_count': self.actual_counts('author', ids, Follow),
+            'following_count': self.actual_counts('user', ids, Follow),
+        }
+        stored = {
+            user_id: counts for user_id, *counts in
+            AuthorStats.objects.filter(user_id__in=ids)
+            .values_list('user_id', *actual)
+        }
+        missing = []
+        fixed = 0
+        for user_id in ids:
+            counts = {field: values.get(user_id, 0)
+                      for field, values in actual.items()}
+            if user_id not in stored:
+                missing.append(AuthorStats(user_id=user_id, **counts))
+            elif stored[user_id] != list(counts.values()):
+                AuthorStats.objects.filter(user_id=user_id).update(**counts)
+                fixed += 1
+        AuthorStats.objects.bulk_create(missing)
+        return fixed + len(missing)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from posts.cache import author_feed, bump_feed_version, group_feed, index_feed
+from posts.models import ArchivedPost, Post
+from posts.rendering import RENDER_VERSION, rerender_posts
+
+
+class Command(BaseCommand):
+    help = 'Заново отрисовывает HTML и отрывки постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Перерисовать все посты, а не только '
+                                 'отрисованные прежней версией правил')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        feeds = {index_feed()}
+        count = 0
+        # Архивные посты тоже выводятся в лентах, поиске и на своих
+        # страницах.
+        for model in (Post, ArchivedPost):
+            posts = model.objects.all()
+            if not options['all']:
+                posts = posts.exclude(html_version=RENDER_VERSION)
+            for author_id, group_id in posts.values_list(
+                    'author_id', 'group_id').order_by().distinct():
+                feeds.add(author_feed(author_id))
+                if group_id is not None:
+                    feeds.add(group_feed(group_id))
+            count += rerender_posts(posts, batch_size=options['batch_size'])
+        if count:
+            bump_feed_version(*feeds)
+        self.stdout.write(f'Отрисовано постов: {count}')
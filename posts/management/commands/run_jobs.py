@@ -0,0 +1,61 @@
+import threading
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts.jobs import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в нескольких потоках'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--poll-interval', type=float, default=1,
+                            help='Пауза в секундах, когда очередь пуста')
+        parser.add_argument('--once', action='store_true',
+                            help='Выйти, когда очередь опустеет')
+
+    def handle(self, *args, **options):
+        self.once = options['once']
+        self.poll_interval = options['poll_interval']
+        self.verbosity = options['verbosity']
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.results = Counter()
+
+        threads = [threading.Thread(target=self.worker, daemon=True)
+                   for _ in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            # Начатые задачи доделываются, новые не берутся.
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(f'Выполнено задач: {self.results[True]}, '
+                          f'с ошибкой: {self.results[False]}')
+
+    def worker(self):
+        try:
+            while not self.stop.is_set():
+                job = claim_job()
+                if job is None:
+                    if self.once:
+                        return
+                    self.stop.wait(self.poll_interval)
+                    continue
+                ok = run_job(job)
+                with self.lock:
+                    self.results[ok] += 1
+                if self.verbosity > 1:
+                    self.stdout.write(f'{job.name} #{job.pk}: '
+                                      f'{"готово" if ok else "ошибка"}')
+        finally:
+            connection.close()
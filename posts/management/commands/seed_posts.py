@@ -0,0 +1,132 @@
+import bisect
+import itertools
+import math
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from posts.bulk import explicit_pub_date, safe_batch_size
+from posts.models import Group, Post, User
+from posts.rendering import render_post
+
+
+WORDS = (
+    'привет день город сегодня новый друг утро вечер солнце дождь дом '
+    'работа книга фильм музыка кофе чай прогулка парк река море лес '
+    'дорога поезд самолёт отпуск выходные праздник семья кот собака '
+    'весна лето осень зима снег ветер небо звезда мечта идея проект код '
+    'тест ошибка релиз команда встреча вопрос ответ история фото путь'
+).split()
+
+
+def zipf_cum_weights(size, exponent):
+    weights = (1 / rank ** exponent for rank in range(1, size + 1))
+    return list(itertools.accumulate(weights))
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу реалистичными пользователями, группами и постами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--zipf', type=float, default=1.1,
+                            help='Показатель распределения Ципфа')
+        parser.add_argument('--no-group-share', type=float, default=0.3,
+                            help='Доля постов без группы')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней разнести даты постов')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--random-seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['random_seed'])
+        prefix = options['prefix']
+        batch_size = options['batch_size']
+
+        user_ids = self.ensure_users(prefix, options['users'], batch_size)
+        group_ids = self.ensure_groups(prefix, options['groups'], batch_size)
+        rng.shuffle(user_ids)
+        rng.shuffle(group_ids)
+
+        user_weights = zipf_cum_weights(len(user_ids), options['zipf'])
+        group_weights = zipf_cum_weights(len(group_ids), options['zipf'])
+        now = timezone.now()
+        span = timedelta(days=options['days']).total_seconds()
+
+        def make_post():
+            group_id = None
+            if group_ids and rng.random() >= options['no_group_share']:
+                group_id = group_ids[bisect.bisect(
+                    group_weights, rng.random() * group_weights[-1])]
+            author_id = user_ids[bisect.bisect(
+                user_weights, rng.random() * user_weights[-1])]
+            return render_post(Post(
+                text=self.make_text(rng),
+                author_id=author_id,
+                group_id=group_id,
+                pub_date=now - timedelta(seconds=rng.random() * span),
+            ))
+
+        created = 0
+        with explicit_pub_date():
+            while created < options['posts']:
+                size = min(batch_size, options['posts'] - created)
+                with transaction.atomic():
+                    Post.objects.bulk_create(
+                        [make_post() for _ in range(size)],
+                        batch_size=safe_batch_size(Post, batch_size),
+                    )
+                created += size
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Постов: {created}')
+        self.stdout.write(f'Создано постов: {created}')
+
+        # bulk_create не отправляет сигналы, поэтому производные данные
+        # пересчитываются целиком.
+        call_command('recount_posts', stdout=self.stdout)
+        if connection.vendor == 'sqlite':
+            call_command('rebuild_search_index', stdout=self.stdout)
+
+    def make_text(self, rng):
+        # Длина постов в словах распределена примерно логнормально:
+        # большинство коротких, но встречаются и длинные тексты.
+        length = max(1, min(2000, int(rng.lognormvariate(math.log(30), 1))))
+        words = rng.choices(WORDS, k=length)
+        sentences = []
+        while words:
+            size = rng.randint(4, 15)
+            sentence, words = words[:size], words[size:]
+            sentences.append(' '.join(sentence).capitalize() + '.')
+        return ' '.join(sentences)
+
+    def ensure_users(self, prefix, count, batch_size):
+        users = User.objects.filter(username__startswith=f'{prefix}_user_')
+        existing = set(users.values_list('username', flat=True))
+        password = make_password(None)
+        User.objects.bulk_create(
+            (User(username=name, password=password)
+             for name in (f'{prefix}_user_{n}' for n in range(count))
+             if name not in existing),
+            batch_size=safe_batch_size(User, batch_size),
+        )
+        return list(users.values_list('pk', flat=True))
+
+    def ensure_groups(self, prefix, count, batch_size):
+        groups = Group.objects.filter(slug__startswith=f'{prefix}-group-')
+        existing = set(groups.values_list('slug', flat=True))
+        Group.objects.bulk_create(
+            (Group(title=f'Сообщество {n}', slug=f'{prefix}-group-{n}',
+                   title_key=Group.make_title_key(f'Сообщество {n}'),
+                   description=f'Описание сообщества {n}')
+             for n in range(count) if f'{prefix}-group-{n}' not in existing),
+            batch_size=safe_batch_size(Group, batch_size),
+        )
+        return list(groups.values_list('pk', flat=True))
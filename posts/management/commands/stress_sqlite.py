@@ -0,0 +1,82 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from posts.decorators import is_locked_error, retry_on_locked
+from posts.models import Post, User
+from posts.paginators import KeysetPaginator
+from yatube.settings import TEN_POSTS
+
+
+class Command(BaseCommand):
+    help = ('Нагружает базу параллельными чтениями ленты и записью постов '
+            'и показывает пропускную способность чтения')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=10)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда рассчитана на SQLite')
+        journal_mode = connection.cursor().execute(
+            'PRAGMA journal_mode').fetchone()[0]
+        self.stdout.write(f'journal_mode: {journal_mode}')
+        self.author, _ = User.objects.get_or_create(username='stress')
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.totals = {'reads': 0, 'writes': 0, 'read_errors': 0,
+                       'write_errors': 0}
+
+        threads = [threading.Thread(target=self.worker,
+                                    args=(self.read, 'read'))
+                   for _ in range(options['readers'])]
+        threads += [threading.Thread(target=self.worker,
+                                     args=(self.write, 'write'))
+                    for _ in range(options['writers'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        totals = self.totals
+
+        self.stdout.write(
+            f'Чтений: {totals["reads"]} ({totals["reads"] / elapsed:.0f}/с), '
+            f'ошибок блокировки: {totals["read_errors"]}')
+        self.stdout.write(
+            f'Записей: {totals["writes"]} '
+            f'({totals["writes"] / elapsed:.0f}/с), '
+            f'ошибок блокировки: {totals["write_errors"]}')
+
+    def count(self, key):
+        with self.lock:
+            self.totals[key] += 1
+
+    def read(self):
+        paginator = KeysetPaginator(
+            Post.objects.select_related('author', 'group'), TEN_POSTS)
+        list(paginator.get_cursor_page())
+
+    @retry_on_locked(attempts=10)
+    def write(self):
+        Post.objects.create(text='Нагрузочный пост', author=self.author)
+
+    def worker(self, action, name):
+        try:
+            while not self.stop.is_set():
+                try:
+                    action()
+                    self.count(f'{name}s')
+                except OperationalError as error:
+                    if not is_locked_error(error):
+                        raise
+                    self.count(f'{name}_errors')
+        finally:
+            connection.close()
@@ -0,0 +1,49 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    counts = Post.objects.order_by().values_list('group').annotate(models.Count('pk'))
+    for group_id, count in counts:
+        if group_id is not None:
+            Group.objects.filter(pk=group_id).update(posts_count=count)
+    counts = Post.objects.order_by().values_list('author').annotate(models.Count('pk'))
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=author_id, posts_count=count)
+         for author_id, count in counts],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0002_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('posts_count', models.PositiveIntegerField(default=0, help_text='Счётчик постов, обновляется при их изменении', verbose_name='Записей')),
+            ],
+            options={
+                'verbose_name': 'Счётчики автора',
+                'verbose_name_plural': 'Счётчики авторов',
+            },
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Счётчик постов, обновляется при их изменении', verbose_name='Записей'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
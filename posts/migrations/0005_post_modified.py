@@ -0,0 +1,24 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:49
+
+from django.db import migrations, models
+
+
+def copy_pub_date(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(modified=models.F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='date modified'),
+        ),
+        migrations.RunPython(copy_pub_date, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:55
+
+from django.db import migrations, models
+import yatube.media
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_follow_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Необязательная картинка к посту', null=True, storage=yatube.media.ContentHashedStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:05
+
+from django.db import migrations, models
+
+
+def fill_title_keys(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    for group in Group.objects.only('title').iterator():
+        Group.objects.filter(pk=group.pk).update(
+            title_key=group.title.strip().casefold())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='title_key',
+            field=models.CharField(db_index=True, default='', editable=False, help_text='Оглавление в нижнем регистре для поиска по началу', max_length=200, verbose_name='Ключ поиска'),
+        ),
+        migrations.RunPython(fill_title_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:08
+
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+
+# Правила отрисовки версии 1 на момент миграции: живой posts.rendering
+# может измениться, а историческая миграция должна писать то же, что и
+# раньше.
+RENDER_VERSION = 1
+EXCERPT_LENGTH = 200
+
+
+def render_posts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.order_by('pk').only('text')
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:500])
+        if not batch:
+            return
+        for post in batch:
+            post.text_html = str(linebreaksbr(post.text, autoescape=True))
+            post.excerpt = Truncator(' '.join(post.text.split())).chars(
+                EXCERPT_LENGTH)
+            post.html_version = RENDER_VERSION
+        Post.objects.bulk_update(
+            batch, ['text_html', 'excerpt', 'html_version'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_group_title_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(default='', editable=False, help_text='Начало текста без разметки для списков', max_length=255, verbose_name='Отрывок'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='html_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Версия правил, по которым отрисован HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(default='', editable=False, help_text='Текст, отрисованный при сохранении', verbose_name='HTML'),
+        ),
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import yatube.media
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_post_text_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('text', models.TextField(help_text='Текст поста', verbose_name='Текст')),
+                ('text_html', models.TextField(default='', editable=False, help_text='Текст, отрисованный при сохранении', verbose_name='HTML')),
+                ('excerpt', models.CharField(default='', editable=False, help_text='Начало текста без разметки для списков', max_length=255, verbose_name='Отрывок')),
+                ('html_version', models.PositiveSmallIntegerField(default=0, editable=False, help_text='Версия правил, по которым отрисован HTML')),
+                ('image', models.ImageField(blank=True, help_text='Необязательная картинка к посту', null=True, storage=yatube.media.ContentHashedStorage(), upload_to='posts/', verbose_name='Картинка')),
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('pub_date', models.DateTimeField(verbose_name='date published')),
+                ('modified', models.DateTimeField(verbose_name='date modified')),
+                ('author', models.ForeignKey(help_text='Автор поста', on_delete=django.db.models.deletion.CASCADE, related_name='archived_posts', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, help_text='Ссылка на группу', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_posts', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Пост из архива',
+                'verbose_name_plural': 'Архив постов',
+                'ordering': ['-pub_date'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['group', '-pub_date', '-id'], name='archived_group_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='archived_author_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['-pub_date', '-id'], name='archived_feed_idx'),
+        ),
+    ]
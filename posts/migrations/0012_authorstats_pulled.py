@@ -0,0 +1,25 @@
+# Generated by Django 2.2.6 on 2026-10-18 09:02
+
+from django.db import migrations, models
+
+
+def mark_pulled(apps, schema_editor):
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    # Порог FOLLOW_FANOUT_LIMIT на момент миграции.
+    AuthorStats.objects.filter(followers_count__gt=1000).update(pulled=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_archived_post'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='pulled',
+            field=models.BooleanField(default=False, help_text='Посты автора не раскладываются по лентам подписчиков', verbose_name='Подмешивается при чтении'),
+        ),
+        migrations.RunPython(mark_pulled, migrations.RunPython.noop),
+    ]
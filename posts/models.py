@@ -1,5 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from .rendering import RENDERED_FIELDS, render_post
+from yatube.media import ContentHashedStorage
 
 
 User = get_user_model()
@@ -12,6 +18,13 @@ class Group(models.Model):
                             help_text='URL для группы')
     description = models.TextField(verbose_name='Описание',
                                    help_text='Описание группы')
+    posts_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Записей',
+        help_text='Счётчик постов, обновляется при их изменении')
+    title_key = models.CharField(
+        max_length=200, db_index=True, editable=False, default='',
+        verbose_name='Ключ поиска',
+        help_text='Оглавление в нижнем регистре для поиска по началу')
 
     class Meta:
         verbose_name_plural = 'Сообщества'
@@ -20,22 +33,270 @@ class Group(models.Model):
     def __str__(self):
         return self.title
 
+    @staticmethod
+    def make_title_key(title):
+        return title.strip().casefold()
+
+    def save(self, *args, **kwargs):
+        self.title_key = self.make_title_key(self.title)
+        super().save(*args, **kwargs)
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                primary_key=True, related_name='stats',
+                                verbose_name='Пользователь')
+    posts_count = models.PositiveIntegerField(
+        default=0, verbose_name='Записей',
+        help_text='Счётчик постов, обновляется при их изменении')
+    followers_count = models.PositiveIntegerField(
+        default=0, verbose_name='Подписчиков',
+        help_text='Счётчик подписчиков, обновляется при подписке и отписке')
+    following_count = models.PositiveIntegerField(
+        default=0, verbose_name='Подписок',
+        help_text='На скольких авторов подписан пользователь')
+    pulled = models.BooleanField(
+        default=False, verbose_name='Подмешивается при чтении',
+        help_text='Посты автора не раскладываются по лентам подписчиков')
+
+    class Meta:
+        verbose_name_plural = 'Счётчики авторов'
+        verbose_name = 'Счётчики автора'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.posts_count}'
+
+    @classmethod
+    def add_posts(cls, user_id, delta):
+        cls.add_counts(user_id, posts_count=delta)
+
+    @classmethod
+    def add_counts(cls, user_id, **deltas):
+        updates = {field: F(field) + delta for field, delta in deltas.items()}
+        updated = cls.objects.filter(user_id=user_id).update(**updates)
+        if not updated:
+            cls.objects.get_or_create(user_id=user_id)
+            cls.objects.filter(user_id=user_id).update(**updates)
+
+
+class PostBase(models.Model):
+    """Поля поста, общие для рабочей и архивной таблиц."""
+
+    archived = False
 
-class Post(models.Model):
     text = models.TextField(verbose_name='Текст',
                             help_text='Текст поста')
+    text_html = models.TextField(
+        default='', editable=False, verbose_name='HTML',
+        help_text='Текст, отрисованный при сохранении')
+    excerpt = models.CharField(
+        max_length=255, default='', editable=False, verbose_name='Отрывок',
+        help_text='Начало текста без разметки для списков')
+    html_version = models.PositiveSmallIntegerField(
+        default=0, editable=False,
+        help_text='Версия правил, по которым отрисован HTML')
     pub_date = models.DateTimeField('date published', auto_now_add=True)
+    modified = models.DateTimeField('date modified', auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                verbose_name='Автор', related_name='posts',
                                help_text='Автор поста')
     group = models.ForeignKey(Group, on_delete=models.SET_NULL, blank=True,
                               verbose_name='Группа', related_name='posts',
                               null=True, help_text='Ссылка на группу')
+    image = models.ImageField(upload_to='posts/', blank=True, null=True,
+                              storage=ContentHashedStorage(),
+                              verbose_name='Картинка',
+                              help_text='Необязательная картинка к посту')
 
     class Meta:
+        abstract = True
         ordering = ['-pub_date']
+
+    def __str__(self):
+        return self.text[:15]
+
+    @property
+    def html(self):
+        return mark_safe(self.text_html)
+
+
+class Post(PostBase):
+    class Meta(PostBase.Meta):
+        indexes = [
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_feed_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_feed_idx'),
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_feed_idx'),
+        ]
         verbose_name_plural = 'Посты'
         verbose_name = 'Пост'
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            render_post(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *RENDERED_FIELDS}
+        # Счётчики в сигналах обновляются в той же транзакции, что и пост.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class ArchivedPost(PostBase):
+    """Пост старше POST_ARCHIVE_AFTER_DAYS, перенесённый `archive_posts`.
+
+    Строки переносятся с теми же id, поэтому ссылки, курсоры лент и
+    полнотекстовый индекс остаются прежними. Архив только читается:
+    счётчики и сигналы рабочей таблицы его не касаются.
+    """
+
+    archived = True
+
+    id = models.IntegerField(primary_key=True)
+    pub_date = models.DateTimeField('date published')
+    modified = models.DateTimeField('date modified')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               verbose_name='Автор',
+                               related_name='archived_posts',
+                               help_text='Автор поста')
+    group = models.ForeignKey(Group, on_delete=models.SET_NULL, blank=True,
+                              verbose_name='Группа',
+                              related_name='archived_posts',
+                              null=True, help_text='Ссылка на группу')
+
+    class Meta(PostBase.Meta):
+        indexes = [
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='archived_group_feed_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='archived_author_feed_idx'),
+            models.Index(fields=['-pub_date', '-id'],
+                         name='archived_feed_idx'),
+        ]
+        verbose_name_plural = 'Архив постов'
+        verbose_name = 'Пост из архива'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             verbose_name='Подписчик', related_name='follower')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               verbose_name='Автор', related_name='following')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique_follow'),
+            models.CheckConstraint(check=~models.Q(user=F('author')),
+                                   name='follow_not_self'),
+        ]
+        verbose_name_plural = 'Подписки'
+        verbose_name = 'Подписка'
+
     def __str__(self):
-        return self.text[:15]
+        return f'{self.user_id} → {self.author_id}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок пользователя.
+
+    Строки создаются при публикации поста (fan-out on write), поэтому
+    лента подписок читается по одному индексу без IN по авторам.
+    `author` и `pub_date` скопированы из поста для отписки и сортировки.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='timeline',
+                             verbose_name='Читатель')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='timeline_entries',
+                             verbose_name='Пост')
+    author = models.ForeignKey(User, on_delete=models.CASCADE,
+                               related_name='+', verbose_name='Автор')
+    pub_date = models.DateTimeField('date published')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='unique_timeline_post'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_feed_idx'),
+        ]
+        verbose_name_plural = 'Ленты подписок'
+        verbose_name = 'Запись ленты подписок'
+
+
+class Job(models.Model):
+    """Фоновая задача, которую выполняет команда `run_jobs`."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField(max_length=100, verbose_name='Задача')
+    args = models.TextField(default='[]', verbose_name='Аргументы',
+                            help_text='Аргументы задачи в JSON')
+    key = models.CharField(max_length=200, unique=True, null=True,
+                           blank=True, verbose_name='Ключ',
+                           help_text='Задача с тем же ключом не ставится '
+                                     'в очередь повторно')
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=QUEUED, verbose_name='Состояние')
+    attempts = models.PositiveSmallIntegerField(default=0,
+                                                verbose_name='Попыток')
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3, verbose_name='Максимум попыток')
+    run_at = models.DateTimeField(default=timezone.now,
+                                  verbose_name='Выполнить не раньше')
+    locked_at = models.DateTimeField(null=True, blank=True,
+                                     verbose_name='Взята в работу')
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name='Поставлена')
+    finished_at = models.DateTimeField(null=True, blank=True,
+                                       verbose_name='Завершена')
+    duration = models.FloatField(null=True, blank=True,
+                                 verbose_name='Длительность, с',
+                                 help_text='Время последней попытки')
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_queue_idx'),
+        ]
+        verbose_name_plural = 'Фоновые задачи'
+        verbose_name = 'Фоновая задача'
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+
+class ImportCheckpoint(models.Model):
+    """Сколько записей источника уже загружено командой import_posts.
+
+    Обновляется в той же транзакции, что и посты пачки, поэтому после
+    сбоя загрузка продолжается ровно с первой несохранённой записи.
+    """
+
+    name = models.CharField(max_length=255, unique=True,
+                            verbose_name='Контрольная точка')
+    done = models.PositiveIntegerField(default=0,
+                                       verbose_name='Обработано записей')
+    modified = models.DateTimeField(auto_now=True, verbose_name='Обновлена')
+
+    class Meta:
+        verbose_name_plural = 'Контрольные точки загрузки'
+        verbose_name = 'Контрольная точка загрузки'
+
+    def __str__(self):
+        return f'{self.name}: {self.done}'
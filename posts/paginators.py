@@ -0,0 +1,266 @@
+import base64
+import binascii
+
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .cache import feed_cache
+from yatube.settings import FEED_CACHE_TIMEOUT, LEGACY_PAGE_LIMIT
+
+
+def encode_cursor(pub_date, pk):
+    raw = f'{pub_date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Вернуть пару (pub_date, id) или None, если курсор испорчен."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        pub_date, pk = raw.decode().split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class KeysetPage(Page):
+    """Страница ленты, которая выбирает посты при первом обращении.
+
+    Если страница целиком взята из кеша фрагментов, запрос к базе
+    так и не выполняется.
+    """
+
+    def __init__(self, paginator, after=None, before=None):
+        self.number = None
+        self.paginator = paginator
+        self.after = after
+        self.before = before if after is None else None
+
+    def __repr__(self):
+        return f'<KeysetPage {self.cursor_key}>'
+
+    @cached_property
+    def _result(self):
+        return self.paginator.fetch(self.after, self.before)
+
+    @property
+    def object_list(self):
+        return self._result[0]
+
+    @property
+    def cursor_key(self):
+        for direction in ('after', 'before'):
+            cursor = getattr(self, direction)
+            if cursor is not None:
+                pub_date, pk = cursor
+                return f'{direction}:{pub_date.isoformat()}:{pk}'
+        return 'first'
+
+    def has_next(self):
+        return self._result[1]
+
+    def has_previous(self):
+        return self._result[2]
+
+    @property
+    def next_cursor(self):
+        if not self.has_next() or not self.object_list:
+            return None
+        post = self.object_list[-1]
+        return encode_cursor(post.pub_date, post.pk)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous() or not self.object_list:
+            return None
+        post = self.object_list[0]
+        return encode_cursor(post.pub_date, post.pk)
+
+    def next_page_number(self):
+        return self.next_cursor
+
+    def previous_page_number(self):
+        return self.previous_cursor
+
+    def start_index(self):
+        """У страницы по курсору нет абсолютной позиции: всегда None."""
+        return None
+
+    def end_index(self):
+        """У страницы по курсору нет абсолютной позиции: всегда None."""
+        return None
+
+
+class KeysetPaginator(Paginator):
+    """Постраничная навигация по ключу (pub_date, id) вместо OFFSET.
+
+    Страница выбирается условием по курсору, поэтому стоимость запроса
+    не зависит от того, насколько далеко пользователь пролистал ленту.
+    Если известен счётчик постов ленты, его можно передать в `count`,
+    чтобы `paginator.count` не выполнял SELECT COUNT(*). Функция в
+    `count` вызывается, только когда число понадобится.
+
+    `archive` — та же лента в архивной таблице. Архив читается, только
+    если рабочая таблица не набрала страницу или листают назад, поэтому
+    свежие страницы по-прежнему стоят один запрос.
+    """
+
+    pk_field = 'pk'
+
+    def __init__(self, object_list, per_page, count=None, archive=None):
+        super().__init__(
+            object_list.order_by('-pub_date', f'-{self.pk_field}'), per_page)
+        self.known_count = count
+        self.archive = None
+        if archive is not None:
+            self.archive = KeysetPaginator(archive, per_page)
+
+    @cached_property
+    def count(self):
+        if self.known_count is None:
+            return super().count
+        if callable(self.known_count):
+            return self.known_count()
+        return self.known_count
+
+    def older_than(self, pub_date, pk):
+        # Отдельное условие pub_date__lte даёт SQLite диапазон по индексу,
+        # по одному OR-выражению он просматривал бы индекс с начала.
+        return self.object_list.filter(pub_date__lte=pub_date).filter(
+            Q(pub_date__lt=pub_date) | Q(**{f'{self.pk_field}__lt': pk}))
+
+    def newer_than(self, pub_date, pk):
+        return self.object_list.filter(pub_date__gte=pub_date).filter(
+            Q(pub_date__gt=pub_date) | Q(**{f'{self.pk_field}__gt': pk}),
+        ).reverse()
+
+    def get_cursor_page(self, after=None, before=None):
+        return KeysetPage(self, decode_cursor(after), decode_cursor(before))
+
+    def select(self, after, before, limit):
+        """Первые `limit` постов за курсором в порядке обхода.
+
+        Для `before` посты идут от старых к новым.
+        """
+        if after is not None:
+            return list(self.older_than(*after)[:limit])
+        if before is not None:
+            return list(self.newer_than(*before)[:limit])
+        return list(self.object_list[:limit])
+
+    def select_with_archive(self, after, before, limit):
+        posts = self.select(after, before, limit)
+        if self.archive is None or (before is None and len(posts) >= limit):
+            return posts
+        # Архивные посты старше рабочих, но при переносе границы они
+        # могут перемешаться, поэтому списки сливаются по ключу.
+        posts.extend(self.archive.select(after, before, limit))
+        posts.sort(key=lambda post: (post.pub_date, post.pk),
+                   reverse=before is None)
+        return posts[:limit]
+
+    def fetch(self, after, before):
+        """Вернуть (посты, has_next, has_previous) для курсора."""
+        limit = self.per_page + 1
+
+        if after is not None:
+            posts = self.select_with_archive(after, None, limit)
+            return posts[:self.per_page], len(posts) > self.per_page, True
+
+        if before is not None:
+            posts = self.select_with_archive(None, before, limit)
+            if posts:
+                has_previous = len(posts) > self.per_page
+                return posts[:self.per_page][::-1], True, has_previous
+
+        posts = self.select_with_archive(None, None, limit)
+        return posts[:self.per_page], len(posts) > self.per_page, False
+
+    def cursor_for_page_number(self, number):
+        """Курсор `after`, ведущий на страницу `number` старой нумерации.
+
+        Возвращает None для первой страницы и для номеров за пределами
+        ленты. Нужен только для перенаправления старых ссылок `?page=N`.
+        Номера больше LEGACY_PAGE_LIMIT не ищутся: OFFSET до них обходил
+        бы индекс с начала, поэтому для них выбрасывается EmptyPage.
+        """
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return None
+        if number <= 1:
+            return None
+        if number > LEGACY_PAGE_LIMIT:
+            raise EmptyPage('Page number is beyond the legacy page limit')
+        offset = (number - 1) * self.per_page - 1
+        posts = list(self.object_list.select_related(None).only('pub_date')[
+            offset:offset + 1])
+        if not posts:
+            return None
+        return encode_cursor(posts[0].pub_date, posts[0].pk)
+
+
+class ApproximatePaginator(Paginator):
+    """Постраничная навигация с ограниченным и кешируемым подсчётом.
+
+    Строки считаются не дальше `count_limit`: если их больше, `count`
+    равен порогу, а `count_is_exact` — False. Если задан `count_key`,
+    число берётся из кеша и COUNT не выполняется, пока ключ жив;
+    вызывающий код включает в ключ версию данных.
+    """
+
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count_limit=1000,
+                 count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_limit = count_limit
+        self.count_key = count_key
+
+    def capped_count(self):
+        if isinstance(self.object_list, QuerySet):
+            return self.object_list[:self.count_limit + 1].count()
+        return self.object_list.count(limit=self.count_limit + 1)
+
+    @cached_property
+    def raw_count(self):
+        if self.count_key is None:
+            return self.capped_count()
+        return feed_cache().get_or_set(f'page-count:{self.count_key}',
+                                       self.capped_count, FEED_CACHE_TIMEOUT)
+
+    @cached_property
+    def count(self):
+        return min(self.raw_count, self.count_limit)
+
+    @property
+    def count_is_exact(self):
+        return self.raw_count <= self.count_limit
+
+    def get_elided_page_range(self, number=1, on_each_side=3, on_ends=1):
+        """Номера страниц вокруг `number` и по краям, пропуски — ELLIPSIS."""
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1,
+                             self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
@@ -0,0 +1,54 @@
+"""Отрисовка текста поста в HTML при сохранении.
+
+Ленты читаются на порядки чаще, чем посты пишутся, поэтому экранирование
+и разбивка на строки выполняются один раз при записи, а шаблоны выводят
+готовый HTML. Если правила отрисовки меняются, увеличьте RENDER_VERSION
+и запустите `render_posts`: команда перерисует устаревшие посты.
+"""
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+from yatube.settings import POST_EXCERPT_LENGTH
+
+
+RENDER_VERSION = 1
+RENDERED_FIELDS = ('text_html', 'excerpt', 'html_version')
+
+
+def render_html(text):
+    return str(linebreaksbr(text, autoescape=True))
+
+
+def make_excerpt(text):
+    """Начало текста в одну строку без разметки."""
+    return Truncator(' '.join(text.split())).chars(POST_EXCERPT_LENGTH)
+
+
+def render_post(post):
+    """Заполнить отрисованные поля поста и вернуть его.
+
+    Сохранение поста вызывает её само; для bulk_create её нужно вызвать
+    перед вставкой.
+    """
+    post.text_html = render_html(post.text)
+    post.excerpt = make_excerpt(post.text)
+    post.html_version = RENDER_VERSION
+    return post
+
+
+def rerender_posts(queryset, batch_size=500):
+    """Перерисовать посты `queryset` пачками; вернуть их число."""
+    done = 0
+    posts = queryset.order_by('pk').only('text')
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return done
+        for post in batch:
+            render_post(post)
+        # bulk_update не трогает modified, поэтому ETag и Last-Modified
+        # постов не меняются, а ленты сбрасывает вызывающий код.
+        queryset.model.objects.bulk_update(batch, RENDERED_FIELDS)
+        done += len(batch)
+        last_pk = batch[-1].pk
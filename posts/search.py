@@ -0,0 +1,147 @@
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from .models import ArchivedPost, Post
+
+
+FTS_TABLE = 'posts_post_fts'
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Превратить пользовательский запрос в безопасное выражение MATCH.
+
+    Каждое слово берётся в кавычки, поэтому операторы FTS5 в запросе
+    не интерпретируются, а все слова должны встретиться в тексте.
+    """
+    terms = ('"{}"'.format(term.replace('"', '""'))
+             for term in query.split())
+    return ' '.join(terms)
+
+
+def index_post(post):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                       [post.pk])
+        cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                       f'VALUES (%s, %s)', [post.pk, post.text])
+
+
+def unindex_post(post_id):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                       [post_id])
+
+
+def unindex_posts(post_ids):
+    if not fts_available() or not post_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} '
+                       f'WHERE rowid IN ({placeholders})', list(post_ids))
+
+
+def index_posts_after(post_id):
+    """Добавить в индекс посты с id больше `post_id`.
+
+    Нужен после `bulk_create`, который не отправляет сигналы.
+    """
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                       f'SELECT id, text FROM posts_post WHERE id > %s',
+                       [post_id])
+
+
+@transaction.atomic
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        # Архивные посты остаются в индексе под теми же id.
+        cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, text) '
+                       f'SELECT id, text FROM posts_post UNION ALL '
+                       f'SELECT id, text FROM posts_archivedpost')
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) "
+                       f"VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def filter_by_text(queryset, query):
+    """Оставить в queryset только посты, содержащие все слова запроса."""
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not fts_available():
+        for term in query.split():
+            queryset = queryset.filter(text__icontains=term)
+        return queryset
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [expression],
+    ))
+
+
+class PostSearchResults:
+    """Посты, найденные по запросу, в порядке релевантности.
+
+    Объект понимает `count()` и срезы, поэтому его можно передать в
+    `ApproximatePaginator`: каждая страница — один запрос к индексу и один
+    запрос за самими постами.
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self.expression = match_expression(query)
+
+    def count(self, limit=None):
+        """Число найденных постов; с `limit` счёт останавливается на нём."""
+        if not self.expression:
+            return 0
+        if not fts_available():
+            posts = filter_by_text(Post.objects.all(), self.query)
+            return (posts if limit is None else posts[:limit]).count()
+        sql = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+        params = [self.expression]
+        if limit is not None:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM ({sql})', params)
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if not self.expression:
+            return []
+        posts = Post.objects.select_related('author', 'group').defer(
+            'text', 'text_html')
+        if not fts_available():
+            return list(filter_by_text(posts, self.query)[index])
+        offset = index.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [self.expression, index.stop - offset, offset],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        found = posts.in_bulk(ids)
+        missing = [pk for pk in ids if pk not in found]
+        if missing:
+            found.update(ArchivedPost.objects.select_related(
+                'author', 'group').defer('text', 'text_html').in_bulk(missing))
+        return [found[pk] for pk in ids if pk in found]
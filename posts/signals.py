@@ -0,0 +1,198 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DEFERRED, F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .cache import author_feed, bump_feed_version, group_feed, index_feed
+from .groups import GROUPS
+from .jobs import enqueue, job
+from .models import (ArchivedPost, AuthorStats, Follow, Group, Post,
+                     User)
+from .search import index_post, unindex_post
+from .thumbnails import schedule_thumbnails
+from .timeline import (clear_timeline, fan_out_post, fill_timeline,
+                       is_pulled, update_pulled)
+
+
+def add_group_posts(group_id, delta):
+    if group_id is None:
+        return
+    groups = Group.objects.filter(pk=group_id)
+    if delta < 0:
+        groups = groups.filter(posts_count__gte=-delta)
+    groups.update(posts_count=F('posts_count') + delta)
+
+
+@job
+def bump_feeds(feeds):
+    bump_feed_version(*feeds)
+
+
+def invalidate_after_commit(feeds):
+    """Сбросить фрагменты лент сейчас, после коммита и после отставания
+    реплики.
+
+    Повторное увеличение после коммита отбрасывает фрагменты, которые
+    параллельный запрос успел отрисовать по старым данным. С репликами
+    старые данные можно прочитать и после коммита, поэтому версии
+    увеличиваются ещё раз через REPLICA_PIN_SECONDS.
+    """
+    feeds = sorted(feeds)
+    bump_feed_version(*feeds)
+    transaction.on_commit(lambda: bump_feed_version(*feeds))
+    if settings.DATABASE_REPLICAS:
+        enqueue(bump_feeds, feeds, delay=settings.REPLICA_PIN_SECONDS)
+
+
+@receiver(post_init, sender=Post)
+@receiver(post_init, sender=ArchivedPost)
+def remember_group(sender, instance, **kwargs):
+    # Обращение к отложенному полю само по себе выполнило бы запрос.
+    instance._saved_group_id = instance.__dict__.get('group_id', DEFERRED)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    saved_group_id = instance._saved_group_id
+    group_id = instance.__dict__.get('group_id', DEFERRED)
+    if created:
+        AuthorStats.add_posts(instance.author_id, 1)
+        add_group_posts(group_id, 1)
+    elif DEFERRED not in (saved_group_id, group_id):
+        if saved_group_id != group_id:
+            add_group_posts(saved_group_id, -1)
+            add_group_posts(group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def count_deleted_post(sender, instance, **kwargs):
+    AuthorStats.objects.filter(
+        user_id=instance.author_id, posts_count__gt=0,
+    ).update(posts_count=F('posts_count') - 1)
+    if instance._saved_group_id is not DEFERRED:
+        add_group_posts(instance._saved_group_id, -1)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_groups(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Заголовок страницы сообщества входит в её ETag через версию ленты.
+    invalidate_after_commit((GROUPS, group_feed(instance.pk)))
+
+
+# Поля пользователя, которые выводятся в карточках постов.
+AUTHOR_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def author_name(user):
+    return tuple(user.__dict__.get(field, DEFERRED)
+                 for field in AUTHOR_NAME_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_author_name(sender, instance, **kwargs):
+    instance._saved_name = author_name(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_feeds(sender, instance, created, raw=False,
+                            update_fields=None, **kwargs):
+    if raw or created:
+        return
+    if update_fields is not None and not set(update_fields) & set(
+            AUTHOR_NAME_FIELDS):
+        return
+    name = author_name(instance)
+    if name == instance._saved_name:
+        return
+    instance._saved_name = name
+    # Имя автора выводится в каждой его карточке, в том числе в общей
+    # ленте и в лентах сообществ.
+    feeds = {index_feed(), author_feed(instance.pk)}
+    for model in (Post, ArchivedPost):
+        feeds.update(group_feed(group_id) for group_id in model.objects.filter(
+            author=instance, group__isnull=False,
+        ).order_by().values_list('group_id', flat=True).distinct())
+    invalidate_after_commit(feeds)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def invalidate_feeds(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    feeds = [index_feed(), author_feed(instance.author_id)]
+    for group_id in (instance._saved_group_id,
+                     instance.__dict__.get('group_id', DEFERRED)):
+        if group_id not in (None, DEFERRED):
+            feeds.append(group_feed(group_id))
+    invalidate_after_commit(set(feeds))
+
+
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, raw=False, update_fields=None,
+                        **kwargs):
+    if raw or (update_fields is not None and 'text' not in update_fields):
+        return
+    index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        enqueue(fan_out_post, instance.pk, key=f'fan-out:{instance.pk}')
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, raw=False, **kwargs):
+    if not raw and instance.__dict__.get('image'):
+        schedule_thumbnails(instance)
+
+
+@receiver(post_save, sender=Post)
+def remember_saved_group(sender, instance, **kwargs):
+    instance._saved_group_id = instance.__dict__.get('group_id', DEFERRED)
+
+
+def invalidate_profiles(follow):
+    # Счётчики подписок выводятся в карточке автора на странице профиля.
+    invalidate_after_commit(
+        (author_feed(follow.author_id), author_feed(follow.user_id)))
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    AuthorStats.add_counts(instance.author_id, followers_count=1)
+    AuthorStats.add_counts(instance.user_id, following_count=1)
+    update_pulled([instance.author_id])
+    if not is_pulled(instance.author_id):
+        enqueue(fill_timeline, instance.author_id, instance.user_id)
+    invalidate_profiles(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def count_unfollow(sender, instance, **kwargs):
+    AuthorStats.objects.filter(
+        user_id=instance.author_id, followers_count__gt=0,
+    ).update(followers_count=F('followers_count') - 1)
+    AuthorStats.objects.filter(
+        user_id=instance.user_id, following_count__gt=0,
+    ).update(following_count=F('following_count') - 1)
+    clear_timeline(instance.user_id, instance.author_id)
+    update_pulled([instance.author_id])
+    invalidate_profiles(instance)
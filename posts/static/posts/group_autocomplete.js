@@ -0,0 +1,32 @@
+// Подсказки сообществ для поля выбора группы: варианты подгружаются
+// по началу названия, в разметке формы есть только выбранный.
+$(function () {
+  $('select[data-autocomplete-url]').each(function () {
+    var $select = $(this);
+    var $input = $('<input type="search" class="form-control mb-1"' +
+                   ' placeholder="Начните вводить название">');
+    var timer = null;
+
+    $input.insertBefore($select);
+    $input.on('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        var query = $.trim($input.val());
+        if (!query) {
+          return;
+        }
+        $.getJSON($select.data('autocomplete-url'), {q: query}, function (data) {
+          var selected = $select.val();
+          $select.find('option').filter(function () {
+            return this.value && this.value !== selected;
+          }).remove();
+          $.each(data.results, function (i, group) {
+            if (String(group.id) !== selected) {
+              $select.append($('<option>').val(group.id).text(group.title));
+            }
+          });
+        });
+      }, 200);
+    });
+  });
+});
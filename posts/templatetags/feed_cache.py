@@ -0,0 +1,46 @@
+from django import template
+
+from posts.cache import fragment_key, get_fragment, set_fragment
+from yatube.routers import is_pinned
+
+
+register = template.Library()
+
+
+class FeedCacheNode(template.Node):
+    def __init__(self, nodelist, feed, page, vary_on):
+        self.nodelist = nodelist
+        self.feed = feed
+        self.page = page
+        self.vary_on = vary_on
+
+    def render(self, context):
+        feed = self.feed.resolve(context)
+        page = self.page.resolve(context)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = fragment_key(feed, page.cursor_key, vary_on)
+        # Запрос, закреплённый за основной базой, не берёт фрагмент из кеша:
+        # его мог отрисовать отстающий от записи запрос к реплике.
+        fragment = None if is_pinned() else get_fragment(key)
+        if fragment is None:
+            fragment = self.nodelist.render(context)
+            set_fragment(key, fragment)
+        return fragment
+
+
+@register.tag
+def feedcache(parser, token):
+    """Кеширует часть шаблона со списком постов ленты.
+
+    Использование::
+
+        {% feedcache feed page [vary_on ...] %} ... {% endfeedcache %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least 2 arguments.")
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    feed, page, *vary_on = (parser.compile_filter(bit) for bit in bits[1:])
+    return FeedCacheNode(nodelist, feed, page, vary_on)
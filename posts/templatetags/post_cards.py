@@ -0,0 +1,66 @@
+from urllib.parse import quote
+
+from django import template
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_script_prefix, reverse
+from django.utils.http import RFC3986_SUBDELIMS
+
+from posts.thumbnails import thumbnail_url
+
+
+register = template.Library()
+
+_profile_prefixes = {}
+
+
+def profile_prefix():
+    """Начало адреса профиля, перед username.
+
+    `reverse()` для каждой карточки заново разбирает URLconf, а здесь
+    адрес разрешается один раз на префикс скрипта.
+    """
+    script_prefix = get_script_prefix()
+    if script_prefix not in _profile_prefixes:
+        url = reverse('profile', args=['x'])
+        _profile_prefixes[script_prefix] = url[:-len('x/')]
+    return _profile_prefixes[script_prefix]
+
+
+@receiver(setting_changed)
+def clear_profile_prefixes(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _profile_prefixes.clear()
+
+
+def quote_username(username):
+    # Так же, как экранирует аргументы сам reverse().
+    return quote(username, safe=RFC3986_SUBDELIMS + '/~:@')
+
+
+@register.simple_tag
+def post_image_url(post, size='card'):
+    """Адрес готовой миниатюры картинки поста.
+
+    Миниатюры создаются после загрузки; если она ещё не готова,
+    отдаётся оригинал, а не создаётся миниатюра во время отрисовки.
+    """
+    if not post.image:
+        return ''
+    return thumbnail_url(post.image, size)
+
+
+@register.inclusion_tag('includes/post_card.html', takes_context=True)
+def post_card(context, post, author=None):
+    author = author or post.author
+    profile_url = f'{profile_prefix()}{quote_username(author.username)}/'
+    card = {
+        'post': post,
+        'author': author,
+        'profile_url': profile_url,
+        'edit_url': None,
+        'image_url': post_image_url(post),
+    }
+    if context.get('user') == author:
+        card['edit_url'] = f'{profile_url}{post.pk}/edit/'
+    return card
@@ -0,0 +1,60 @@
+import gzip
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from yatube.assets import serve_static
+
+
+CSS = b'body { color: #333; }\n' * 50
+
+
+class StaticAssetsTest(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        source = os.path.join(tmp.name, 'source')
+        self.root = os.path.join(tmp.name, 'root')
+        os.makedirs(os.path.join(source, 'css'))
+        with open(os.path.join(source, 'css', 'site.css'), 'wb') as f:
+            f.write(CSS)
+        settings = override_settings(STATICFILES_DIRS=[source],
+                                     STATIC_ROOT=self.root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0,
+                     stdout=StringIO())
+        self.name = staticfiles_storage.stored_name('css/site.css')
+        self.factory = RequestFactory()
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        self.assertRegex(self.name, r'^css/site\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(self.root, self.name + '.gz'), 'rb') as f:
+            self.assertEquals(gzip.decompress(f.read()), CSS)
+
+    def test_serves_compressed_variant_with_immutable_caching(self):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        response = serve_static(request, self.name, document_root=self.root)
+        self.assertEquals(response['Content-Encoding'], 'gzip')
+        self.assertEquals(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEquals(
+            gzip.decompress(b''.join(response.streaming_content)), CSS)
+
+    def test_serves_original_without_accept_encoding(self):
+        response = serve_static(self.factory.get('/'), self.name,
+                                document_root=self.root)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEquals(b''.join(response.streaming_content), CSS)
+        response = serve_static(self.factory.get('/'), 'css/site.css',
+                                document_root=self.root)
+        self.assertFalse(response.has_header('Cache-Control'))
+
+    def test_uncollected_file_keeps_its_name(self):
+        self.assertEquals(staticfiles_storage.url('js/missing.js'),
+                          '/static/js/missing.js')
@@ -0,0 +1,228 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.archive import archive_batch
+from posts.management.commands.import_posts import Command as ImportCommand
+from posts.models import (ArchivedPost, AuthorStats, Group,
+                          ImportCheckpoint, Post)
+from posts.rendering import RENDER_VERSION
+
+
+class BenchmarkFeedsCommandTest(TestCase):
+    def test_benchmark_uses_feed_indexes(self):
+        out = StringIO()
+        call_command('benchmark_feeds', seed=30, repeat=1, stdout=out)
+        output = out.getvalue()
+        self.assertEquals(Post.objects.count(), 30)
+        for index in ('post_feed_idx', 'post_group_feed_idx',
+                      'post_author_feed_idx'):
+            with self.subTest(index=index):
+                self.assertIn(index, output)
+
+
+class RecountPostsCommandTest(TestCase):
+    def test_recount_fixes_drifted_counters(self):
+        user = get_user_model().objects.create_user(username='Ya')
+        group = Group.objects.create(title='church', slug='churches',
+                                     description='bread')
+        for _ in range(3):
+            Post.objects.create(text='crush', author=user, group=group)
+        Group.objects.update(posts_count=10)
+        AuthorStats.objects.all().delete()
+
+        call_command('recount_posts', batch_size=1, stdout=StringIO())
+        group.refresh_from_db()
+        self.assertEquals(group.posts_count, 3)
+        self.assertEquals(AuthorStats.objects.get(user=user).posts_count, 3)
+
+
+class RenderPostsCommandTest(TestCase):
+    def test_rerenders_stale_posts(self):
+        user = get_user_model().objects.create_user(username='Ya')
+        post = Post.objects.create(text='crush\nbread', author=user)
+        Post.objects.create(text='fresh', author=user)
+        Post.objects.filter(pk=post.pk).update(
+            text_html='', excerpt='', html_version=0)
+
+        out = StringIO()
+        call_command('render_posts', batch_size=1, stdout=out)
+        self.assertIn('Отрисовано постов: 1', out.getvalue())
+        post.refresh_from_db()
+        self.assertEquals(post.text_html, 'crush<br>bread')
+        self.assertEquals(post.excerpt, 'crush bread')
+
+    def test_rerenders_archived_posts(self):
+        user = get_user_model().objects.create_user(username='Ya')
+        post = Post.objects.create(text='old\nbread', author=user)
+        archive_batch(timezone.now(), 10)
+        ArchivedPost.objects.update(text_html='', html_version=0)
+
+        out = StringIO()
+        call_command('render_posts', stdout=out)
+        self.assertIn('Отрисовано постов: 1', out.getvalue())
+        archived = ArchivedPost.objects.get(pk=post.pk)
+        self.assertEquals(archived.text_html, 'old<br>bread')
+        self.assertEquals(archived.html_version, RENDER_VERSION)
+
+
+class SeedAndBenchmarkCommandsTest(TestCase):
+    def test_seed_posts(self):
+        call_command('seed_posts', users=5, groups=3, posts=40,
+                     random_seed=1, stdout=StringIO())
+        self.assertEquals(Post.objects.count(), 40)
+        self.assertEquals(
+            sum(Group.objects.values_list('posts_count', flat=True)),
+            Post.objects.exclude(group=None).count())
+        self.assertEquals(
+            sum(AuthorStats.objects.values_list('posts_count', flat=True)),
+            40)
+
+    def test_benchmark_views_reports_json(self):
+        call_command('seed_posts', users=3, groups=2, posts=15,
+                     random_seed=1, stdout=StringIO())
+        out = StringIO()
+        call_command('benchmark_views', requests=3, warmup=0,
+                     memory_requests=1, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEquals(set(report['results']),
+                          {'index', 'group_posts', 'profile', 'post',
+                           'new_post'})
+        for name, result in report['results'].items():
+            with self.subTest(name=name):
+                self.assertEquals(result['statuses'], [200])
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+                if name == 'new_post':
+                    # пустой форме хватает закешированных сессии,
+                    # пользователя и сообществ
+                    self.assertEquals(result['queries_per_request'], 0)
+                else:
+                    self.assertGreater(result['queries_per_request'], 0)
+
+
+class ImportPostsCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya')
+        cls.group = Group.objects.create(title='church', slug='churches',
+                                         description='bread')
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_import_jsonl_updates_counters(self):
+        records = [
+            {'author': 'Ya', 'group': 'churches', 'text': 'Первый',
+             'pub_date': '2020-01-01T10:00:00'},
+            {'author': 'Ya', 'text': 'Второй'},
+            {'author': 'Nobody', 'text': 'Потерянный'},
+        ]
+        path = self.write('posts.jsonl', '\n'.join(
+            json.dumps(record) for record in records))
+        call_command('import_posts', path, batch_size=1, commit_every=2,
+                     stdout=StringIO(), stderr=StringIO())
+
+        self.assertEquals(Post.objects.count(), 2)
+        first = Post.objects.get(text='Первый')
+        self.assertEquals(first.pub_date.year, 2020)
+        self.assertEquals(first.group, ImportPostsCommandTest.group)
+        self.group.refresh_from_db()
+        self.assertEquals(self.group.posts_count, 1)
+        self.assertEquals(AuthorStats.objects.get(user=self.user).posts_count,
+                          2)
+
+    def test_import_csv_creates_missing_and_resumes(self):
+        path = self.write('posts.csv', 'author,group,text\n'
+                                       'new_author,,Раз\n'
+                                       'new_author,new-group,Два\n')
+        ImportCheckpoint.objects.create(name='posts', done=1)
+        call_command('import_posts', path, create_missing=True,
+                     checkpoint='posts', stdout=StringIO())
+
+        self.assertEquals(list(Post.objects.values_list('text', flat=True)),
+                          ['Два'])
+        self.assertTrue(Group.objects.filter(slug='new-group').exists())
+        self.assertEquals(ImportCheckpoint.objects.get(name='posts').done, 2)
+
+    def test_skips_records_that_are_not_objects(self):
+        path = self.write('posts.jsonl', '[1]\n"x"\n'
+                                         '{"author": "Ya", "text": "Пост"}\n')
+        err = StringIO()
+        call_command('import_posts', path, checkpoint='posts',
+                     stdout=StringIO(), stderr=err)
+        self.assertEquals(list(Post.objects.values_list('text', flat=True)),
+                          ['Пост'])
+        self.assertIn('строка 2: не объект JSON', err.getvalue())
+        self.assertEquals(ImportCheckpoint.objects.get(name='posts').done, 3)
+
+    def test_skips_fields_that_are_not_strings(self):
+        records = [
+            {'author': 'Ya', 'text': 5},
+            {'author': ['Ya'], 'text': 'Список'},
+            {'author': 'Ya', 'group': {'slug': 'churches'}, 'text': 'Группа'},
+            {'author': 'Ya', 'text': 'Дата', 'pub_date': 123},
+            {'author': 'Ya', 'text': 'Пост'},
+        ]
+        path = self.write('posts.jsonl', '\n'.join(
+            json.dumps(record) for record in records))
+        out, err = StringIO(), StringIO()
+        call_command('import_posts', path, create_missing=True,
+                     stdout=out, stderr=err)
+        self.assertEquals(list(Post.objects.values_list('text', flat=True)),
+                          ['Пост'])
+        self.assertIn('пропущено записей: 4', out.getvalue())
+        self.assertIn('строка 4: поле pub_date должно быть строкой',
+                      err.getvalue())
+
+    def test_checkpoint_rolls_back_with_chunk(self):
+        path = self.write('posts.jsonl', '{"author": "Ya", "text": "Пост"}\n')
+        write_checkpoint = ImportCommand.write_checkpoint
+
+        def crash_after_checkpoint(command, done):
+            write_checkpoint(command, done)
+            raise RuntimeError
+
+        with mock.patch.object(ImportCommand, 'write_checkpoint',
+                               crash_after_checkpoint):
+            with self.assertRaises(RuntimeError):
+                call_command('import_posts', path, checkpoint='posts',
+                             stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+
+class ExportPostsCommandTest(TestCase):
+    def test_export_group_posts(self):
+        user = get_user_model().objects.create_user(username='Ya')
+        group = Group.objects.create(title='church', slug='churches',
+                                     description='bread')
+        Post.objects.create(text='В группе', author=user, group=group)
+        Post.objects.create(text='Без группы', author=user)
+        out = StringIO()
+        call_command('export_posts', group='churches', stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEquals([row['text'] for row in rows], ['В группе'])
+
+
+class BenchmarkTemplatesCommandTest(TestCase):
+    def test_renders_all_sizes_without_queries(self):
+        out = StringIO()
+        with self.assertNumQueries(0):
+            call_command('benchmark_templates', sizes=[1, 3], repeat=1,
+                         stdout=out)
+        self.assertEquals(len(out.getvalue().splitlines()), 6)
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+
+from posts.decorators import retry_on_locked
+
+
+class SQLitePragmasTest(TestCase):
+    def test_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            pragmas = {
+                'synchronous': 1,
+                'busy_timeout': 5000,
+                'cache_size': -64 * 1024,
+            }
+            for name, expected in pragmas.items():
+                with self.subTest(name=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEquals(cursor.fetchone()[0], expected)
+
+
+class RetryOnLockedTest(TransactionTestCase):
+    def setUp(self):
+        patcher = mock.patch('posts.decorators.time.sleep')
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retries_locked_database(self):
+        calls = []
+
+        @retry_on_locked(attempts=3)
+        def write():
+            calls.append(connection.in_atomic_block)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'done'
+
+        self.assertEquals(write(), 'done')
+        self.assertEquals(calls, [True, True, True])
+        self.assertEquals(self.sleep.call_count, 2)
+
+    def test_gives_up_after_attempts(self):
+        @retry_on_locked(attempts=2)
+        def write():
+            raise OperationalError('database is locked')
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEquals(self.sleep.call_count, 1)
+
+    def test_other_errors_are_not_retried(self):
+        @retry_on_locked
+        def write():
+            raise OperationalError('no such table: posts_post')
+
+        with self.assertRaises(OperationalError):
+            write()
+        self.sleep.assert_not_called()
@@ -0,0 +1,123 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.archive import archive_batch
+from posts.deletion import delete_posts_batch
+from posts.jobs import run_pending
+from posts.models import (ArchivedPost, AuthorStats, Follow, Group, Post,
+                          TimelineEntry)
+from posts.search import FTS_TABLE, fts_available
+
+
+class BatchedDeleteTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.spammer = User.objects.create_user(username='spam')
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Тест', slug='test')
+        Follow.objects.create(user=cls.reader, author=cls.spammer)
+        Follow.objects.create(user=cls.spammer, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(7):
+            Post.objects.create(text=f'спам {i}', author=cls.spammer,
+                                group=cls.group)
+        cls.kept = Post.objects.create(text='обычный пост', author=cls.author,
+                                       group=cls.group)
+        run_pending()
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def indexed(self):
+        if not fts_available():
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {FTS_TABLE}')
+            return cursor.fetchone()[0]
+
+    def test_delete_user_in_batches_and_resume(self):
+        # Два самых старых поста в архиве, ещё три удалены прерванным
+        # запуском.
+        archive_batch(Post.objects.order_by('-pub_date')[0].pub_date, 2)
+        self.assertEquals(delete_posts_batch(
+            Post, 3, author_id=self.spammer.pk), 3)
+
+        out = StringIO()
+        call_command('delete_batched', user=['spam'], batch_size=3,
+                     verbosity=2, stdout=out)
+        self.assertIn('posts: 2', out.getvalue())
+        self.assertIn('archived_posts: 2', out.getvalue())
+
+        self.assertFalse(get_user_model().objects.filter(
+            username='spam').exists())
+        self.assertEquals(list(Post.objects.all()), [self.kept])
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(TimelineEntry.objects.exclude(
+            post=self.kept).exists())
+        self.assertFalse(Follow.objects.filter(author=self.spammer).exists())
+        self.group.refresh_from_db()
+        self.assertEquals(self.group.posts_count, 1)
+        self.assertEquals(self.stats(self.author).followers_count, 1)
+        self.assertEquals(self.stats(self.reader).following_count, 1)
+        if fts_available():
+            self.assertEquals(self.indexed(), 1)
+
+    def test_delete_group_keeps_posts(self):
+        call_command('delete_batched', group=['test'], batch_size=3,
+                     stdout=StringIO())
+        self.assertFalse(Group.objects.exists())
+        self.assertEquals(Post.objects.filter(group=None).count(), 8)
+        self.assertGreater(Post.objects.get(pk=self.kept.pk).modified,
+                           self.kept.modified)
+        self.assertEquals(self.stats(self.spammer).posts_count, 7)
+
+    def test_plain_delete_counts_archived_posts(self):
+        archive_batch(Post.objects.order_by('-pub_date')[0].pub_date, 3)
+        self.spammer.delete()
+        self.group.refresh_from_db()
+        self.assertEquals(self.group.posts_count, 1)
+        self.assertFalse(ArchivedPost.objects.exists())
+
+    def test_admin_action_queues_deletion(self):
+        admin = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        client = Client()
+        client.force_login(admin)
+        response = client.post(
+            reverse('admin:auth_user_changelist'),
+            {'action': 'delete_in_batches',
+             '_selected_action': [self.spammer.pk]})
+        self.assertEquals(response.status_code, 302)
+        self.spammer.refresh_from_db()
+        self.assertFalse(self.spammer.is_active)
+        self.assertEquals(Post.objects.filter(author=self.spammer).count(), 7)
+
+        run_pending()
+        self.assertFalse(get_user_model().objects.filter(
+            username='spam').exists())
+        self.assertEquals(Post.objects.count(), 1)
+
+    def test_admin_delete_button_queues_deletion(self):
+        admin = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        client = Client()
+        client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=[self.spammer.pk])
+        self.assertEquals(client.get(url).status_code, 200)
+        response = client.post(url, {'post': 'yes'})
+        self.assertRedirects(response, reverse('admin:auth_user_changelist'))
+        self.spammer.refresh_from_db()
+        self.assertFalse(self.spammer.is_active)
+        self.assertEquals(Post.objects.filter(author=self.spammer).count(), 7)
+
+        run_pending()
+        self.assertFalse(get_user_model().objects.filter(
+            username='spam').exists())
@@ -1,9 +1,26 @@
-from django.test import TestCase, Client
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from posts.forms import PostForm
 from posts.models import Group, Post
+from posts.thumbnails import generate_post_thumbnails
+from yatube.media import serve_media
+
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
 class GroupCreateFormTest(TestCase):
@@ -73,3 +90,56 @@ class GroupCreateFormTest(TestCase):
         self.assertEqual(Post.objects.last().text, 'Ya')
         self.assertEqual(Post.objects.last().group.id, group.id)
         self.assertRedirects(response, reverse('post', args=[user, post.id]))
+
+
+class PostImageFormTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_settings = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_settings.enable()
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_settings.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(PostImageFormTest.user)
+
+    def upload(self, text):
+        image = SimpleUploadedFile('small.gif', SMALL_GIF,
+                                   content_type='image/gif')
+        self.authorized_client.post(reverse('new_post'),
+                                    data={'text': text, 'image': image})
+        return Post.objects.get(text=text)
+
+    def test_image_is_named_by_content(self):
+        first = self.upload('Первый')
+        second = self.upload('Второй')
+        self.assertRegex(first.image.name, r'^posts/[0-9a-f]{32}\.gif$')
+        self.assertEquals(first.image.name, second.image.name)
+
+    def test_feed_uses_pregenerated_thumbnail(self):
+        post = self.upload('С картинкой')
+        url = reverse('profile', args=[PostImageFormTest.user])
+        response = self.authorized_client.get(url)
+        self.assertContains(response, post.image.url)
+
+        generate_post_thumbnails(post.pk)
+        response = self.authorized_client.get(url)
+        self.assertNotContains(response, post.image.url)
+        self.assertContains(response, '/media/cache/')
+
+    def test_media_is_cached_for_a_year(self):
+        post = self.upload('Кеш')
+        request = RequestFactory().get(post.image.url)
+        response = serve_media(request, post.image.name,
+                               document_root=post.image.storage.location)
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
@@ -0,0 +1,83 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from posts.jobs import enqueue, job, run_pending
+from posts.models import Job, Post, TimelineEntry
+
+
+calls = []
+
+
+@job(name='tests.record', max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@job(name='tests.flaky', max_attempts=2)
+def flaky(value):
+    raise ValueError(value)
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_jobs_run_in_order_and_record_timing(self):
+        enqueue(record, 1)
+        enqueue(record, 2)
+        self.assertEquals(run_pending(), 2)
+        self.assertEquals(calls, [1, 2])
+        for done in Job.objects.all():
+            with self.subTest(job=done.pk):
+                self.assertEquals(done.status, Job.DONE)
+                self.assertIsNotNone(done.duration)
+
+    def test_idempotency_key(self):
+        self.assertIsNotNone(enqueue(record, 1, key='once'))
+        self.assertIsNone(enqueue(record, 1, key='once'))
+        run_pending()
+        self.assertIsNone(enqueue(record, 1, key='once'))
+        self.assertEquals(calls, [1])
+
+    def test_failed_job_is_retried_then_given_up(self):
+        failed = enqueue(flaky, 'boom')
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            run_pending()
+        failed.refresh_from_db()
+        self.assertEquals((failed.status, failed.attempts),
+                          (Job.QUEUED, 1))
+        self.assertGreater(failed.run_at, timezone.now())
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            run_pending()
+        failed.refresh_from_db()
+        self.assertEquals(failed.status, Job.FAILED)
+        self.assertIn('ValueError: boom', failed.last_error)
+
+    def test_stale_running_job_is_reclaimed(self):
+        enqueue(record, 1)
+        Job.objects.update(status=Job.RUNNING, attempts=1,
+                           locked_at=timezone.now() - timedelta(hours=1))
+        run_pending()
+        self.assertEquals(calls, [1])
+        self.assertEquals(Job.objects.get().attempts, 2)
+
+
+class RunJobsCommandTest(TransactionTestCase):
+    def test_new_post_returns_before_fan_out(self):
+        reader = get_user_model().objects.create_user(username='reader')
+        author = get_user_model().objects.create_user(username='author')
+        reader.follower.create(author=author)
+        run_pending()
+        post = Post.objects.create(text='Пост', author=author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        out = StringIO()
+        call_command('run_jobs', once=True, threads=2, stdout=out)
+        self.assertIn('Выполнено задач: 1', out.getvalue())
+        self.assertEquals(TimelineEntry.objects.get(user=reader).post, post)
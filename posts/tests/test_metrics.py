@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from posts.models import Post
+from yatube.metrics import HISTOGRAMS, REQUEST_DURATION
+
+
+class RequestMetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya')
+        cls.staff = get_user_model().objects.create_user(username='Admin',
+                                                         is_staff=True)
+        Post.objects.create(text='Ya', author=cls.user)
+
+    def setUp(self):
+        for histogram in HISTOGRAMS:
+            histogram.clear()
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(RequestMetricsTest.staff)
+
+    def test_server_timing_header(self):
+        response = self.guest_client.get(reverse('profile',
+                                                 args=[self.user]))
+        timing = response['Server-Timing']
+        for metric in ('total;dur=', 'db;dur=', 'tpl;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+
+    def test_requests_are_grouped_by_view_name(self):
+        self.guest_client.get(reverse('index'))
+        self.guest_client.get(reverse('index'))
+        self.guest_client.get(reverse('about:author'))
+        counts = {label: sum(counts)
+                  for label, (counts, _) in REQUEST_DURATION.values.items()}
+        self.assertEquals(counts, {'index': 2, 'about:author': 1})
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.guest_client.get(reverse('index'))
+        response = self.guest_client.get(reverse('metrics'))
+        self.assertEquals(response.status_code, 302)
+
+        response = self.staff_client.get(reverse('metrics'))
+        self.assertEquals(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram',
+                      body)
+        self.assertIn('yatube_db_queries_count{view="index"} 1', body)
+        self.assertIn('yatube_request_duration_seconds_bucket{view="index",'
+                      'le="+Inf"} 1', body)
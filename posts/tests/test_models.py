@@ -52,3 +52,59 @@ class PostModelTest(TestCase):
         post = PostModelTest.post
         expected_object_name = 'crush'
         self.assertEquals(post.text, expected_object_name)
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya')
+        cls.group = Group.objects.create(title='church', slug='churches',
+                                         description='bread')
+        cls.other_group = Group.objects.create(title='shop', slug='shops',
+                                               description='milk')
+
+    def counts(self):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        return (self.user.stats.posts_count, self.group.posts_count,
+                self.other_group.posts_count)
+
+    def test_create_change_group_and_delete(self):
+        post = Post.objects.create(text='crush', author=self.user,
+                                   group=self.group)
+        Post.objects.create(text='no group', author=self.user)
+        self.assertEquals(self.counts(), (2, 1, 0))
+
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertEquals(self.counts(), (2, 0, 1))
+
+        post.text = 'same group'
+        post.save()
+        self.assertEquals(self.counts(), (2, 0, 1))
+
+        post.delete()
+        self.user.stats.refresh_from_db()
+        self.assertEquals(self.counts(), (1, 0, 0))
+
+
+class PostRenderingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya')
+
+    def test_html_and_excerpt_are_rendered_on_save(self):
+        post = Post.objects.create(text='<b>crush</b>\nбез   сжатия',
+                                   author=self.user)
+        self.assertEquals(post.text_html,
+                          '&lt;b&gt;crush&lt;/b&gt;<br>без   сжатия')
+        self.assertEquals(post.excerpt, '<b>crush</b> без сжатия')
+
+        post.text = 'x' * 300
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEquals(post.text_html, 'x' * 300)
+        self.assertEquals(len(post.excerpt), 200)
@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.cache import get_feed_version, index_feed
+from posts.jobs import REGISTRY
+from posts.models import Job, Post
+from posts.rendering import render_post
+from posts.signals import bump_feeds
+from yatube.routers import PIN_COOKIE, PrimaryReplicaRouter, is_pinned
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTest(TransactionTestCase):
+    """Основная база — тестовая, реплика — отдельный файл SQLite."""
+
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        connections.databases['replica'] = dict(
+            connections.databases['default'],
+            NAME=os.path.join(cls.tmp.name, 'replica.sqlite3'),
+            TEST={'NAME': os.path.join(cls.tmp.name, 'replica.sqlite3')},
+        )
+        connections.ensure_defaults('replica')
+        connections.prepare_test_settings('replica')
+        call_command('migrate', database='replica', verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections.databases['replica']
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='Ya')
+        self.router = PrimaryReplicaRouter()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_reads_go_to_replica_writes_to_primary(self):
+        self.assertEquals(self.router.db_for_read(Session), 'default')
+        self.assertEquals(self.router.db_for_write(Post), 'default')
+        # Вне запроса запись ничего не закрепляет, а читается основная
+        # база.
+        self.assertFalse(is_pinned())
+        self.assertEquals(self.router.db_for_read(Post), 'default')
+
+    def test_feeds_are_bumped_again_after_replica_lag(self):
+        Post.objects.create(text='Новый пост', author=self.user)
+        job = Job.objects.get(name=bump_feeds.job_name,
+                              args__contains=index_feed())
+        self.assertGreater(job.run_at, job.created)
+        version = get_feed_version(index_feed())
+        REGISTRY[job.name](*json.loads(job.args))
+        self.assertNotEquals(get_feed_version(index_feed()), version)
+
+    def test_feed_is_read_from_replica(self):
+        replica_user = get_user_model().objects.using('replica').create(
+            username='Replica')
+        # bulk_create не вызывает сигналы, которые пишут в основную базу.
+        Post.objects.using('replica').bulk_create(
+            [render_post(Post(text='С реплики', author=replica_user))])
+        Post.objects.create(text='С основной базы', author=self.user)
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'С реплики')
+        self.assertNotContains(response, 'С основной базы')
+
+    def test_author_reads_own_writes(self):
+        response = self.authorized_client.post(
+            reverse('new_post'), {'text': 'Только что написал'})
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertNotContains(self.guest_client.get(reverse('index')),
+                               'Только что написал')
+        response = self.authorized_client.get(reverse('index'))
+        self.assertContains(response, 'Только что написал')
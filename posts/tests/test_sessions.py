@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from yatube.auth import USERS
+from yatube.sessions import SESSIONS
+
+
+class CachedSessionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya',
+                                                        password='secret')
+
+    def setUp(self):
+        cache.clear()
+        SESSIONS.clear()
+        USERS.clear()
+        self.client = Client()
+        self.client.login(username='Ya', password='secret')
+
+    def page_user(self):
+        response = self.client.get(reverse('about:author'))
+        return response.context['user']
+
+    def test_repeated_requests_skip_session_and_user_queries(self):
+        self.assertEquals(self.page_user(), CachedSessionTest.user)
+        with self.assertNumQueries(0):
+            self.assertEquals(self.page_user().username, 'Ya')
+        self.assertGreaterEqual(SESSIONS.stats()['hits'], 1)
+        self.assertGreaterEqual(USERS.stats()['hits'], 1)
+
+    def test_user_save_refreshes_cached_user(self):
+        self.page_user()
+        user = get_user_model().objects.get(pk=CachedSessionTest.user.pk)
+        user.first_name = 'Новое имя'
+        user.save()
+        self.assertEquals(self.page_user().first_name, 'Новое имя')
+
+    def test_password_change_ends_other_sessions(self):
+        self.page_user()
+        user = get_user_model().objects.get(pk=CachedSessionTest.user.pk)
+        user.set_password('changed')
+        user.save()
+        self.assertFalse(self.page_user().is_authenticated)
+
+    def test_logout_drops_cached_session(self):
+        session_key = self.client.session.session_key
+        self.page_user()
+        self.client.get(reverse('logout'))
+        self.client.cookies['sessionid'] = session_key
+        self.assertFalse(self.page_user().is_authenticated)
+
+    def post_is_authenticated(self):
+        # Анонимного пользователя new_post отправляет на страницу входа.
+        return self.client.post(reverse('new_post')).status_code == 200
+
+    def test_writes_recheck_session_ended_elsewhere(self):
+        self.page_user()
+        # Выход в другом процессе: в кеше этого процесса сессия осталась.
+        Session.objects.all().delete()
+        self.assertTrue(self.page_user().is_authenticated)
+        self.assertFalse(self.post_is_authenticated())
+
+    def test_writes_recheck_deactivated_user(self):
+        self.page_user()
+        get_user_model().objects.filter(
+            pk=CachedSessionTest.user.pk).update(is_active=False)
+        self.assertFalse(self.post_is_authenticated())
+        self.assertFalse(self.page_user().is_authenticated)
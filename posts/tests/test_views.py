@@ -1,10 +1,31 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import Context, Template
 from django.test import TestCase, Client
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django import forms
 from django.urls import reverse
 
-from posts.models import Group, Post
+from posts.archive import archive_batch
+from posts.bulk import explicit_pub_date
+from posts.cache import feed_cache_stats, reset_feed_cache_stats
+from posts.groups import clear_local_groups, get_group
+from posts.jobs import run_pending
+from posts.models import (ArchivedPost, AuthorStats, Follow, Group, Post,
+                          TimelineEntry)
+from posts.paginators import ApproximatePaginator
+from posts.timeline import is_pulled
+from yatube.auth import USERS
 
 
 class PostPagesTest(TestCase):
@@ -128,5 +149,700 @@ class PaginatorViewsTest(TestCase):
         self.assertEquals(len(response.context.get('page').object_list), 10)
 
     def test_second_page_containse_three_records(self):
-        response = self.authorized_client.get('/' + '?page=2')
+        response = self.authorized_client.get('/' + '?page=2', follow=True)
         self.assertEquals(len(response.context.get('page').object_list), 3)
+
+    def test_page_number_redirects_to_cursor(self):
+        response = self.authorized_client.get('/' + '?page=2')
+        self.assertEquals(response.status_code, 302)
+        self.assertTrue(response.url.startswith('/?after='))
+
+    def test_page_number_beyond_limit_is_not_found(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/?page=40000')
+        self.assertEquals(response.status_code, 404)
+
+    def test_keyset_page_has_no_absolute_position(self):
+        page = self.authorized_client.get(reverse('index')).context['page']
+        self.assertIsNone(page.start_index())
+        self.assertIsNone(page.end_index())
+
+    def test_group_count_comes_from_counter(self):
+        Group.objects.filter(pk=PaginatorViewsTest.group.pk).update(
+            posts_count=42)
+        response = self.guest_client.get(reverse('group_posts',
+                                                 args=['test']))
+        paginator = response.context['paginator']
+        with self.assertNumQueries(1):
+            self.assertEquals(paginator.count, 42)
+
+    def test_first_page_number_redirects_to_feed(self):
+        response = self.authorized_client.get('/' + '?page=1')
+        self.assertRedirects(response, reverse('index'))
+
+    def test_cursor_pages_cover_feed(self):
+        first = self.authorized_client.get(reverse('index')).context['page']
+        response = self.authorized_client.get(
+            reverse('index') + f'?after={first.next_cursor}')
+        second = response.context['page']
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+        ids = [post.id for post in list(first) + list(second)]
+        self.assertEquals(ids, list(range(12, -1, -1)))
+
+        response = self.authorized_client.get(
+            reverse('index') + f'?before={second.previous_cursor}')
+        self.assertEquals(list(response.context['page']), list(first))
+        self.assertFalse(response.context['page'].has_previous())
+
+    def test_broken_cursor_shows_first_page(self):
+        response = self.authorized_client.get(reverse('index') + '?after=xx')
+        self.assertEquals(len(response.context.get('page').object_list), 10)
+        self.assertFalse(response.context.get('page').has_previous())
+
+
+class FeedQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya')
+        cls.group = Group.objects.create(
+            title='Тест',
+            slug='test',
+            description='Домашние тесты',
+        )
+        for i in range(15):
+            cls.post = Post.objects.create(
+                text=f'Ya {i}',
+                author=cls.user,
+                group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+        clear_local_groups()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FeedQueriesTest.user)
+
+    def test_feed_pages_queries(self):
+        user = FeedQueriesTest.user
+        # Первый запрос каждой страницы — поиск валидатора для ETag.
+        pages = {
+            reverse('index'): 1,
+            reverse('group_posts', args=[FeedQueriesTest.group.slug]): 2,
+            reverse('profile', args=[user]): 3,
+            reverse('post', args=[user, FeedQueriesTest.post.id]): 2,
+        }
+        for url, queries in pages.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    self.guest_client.get(url)
+
+    def test_post_edit_queries(self):
+        user = FeedQueriesTest.user
+        url = reverse('post_edit', args=[user, FeedQueriesTest.post.id])
+        USERS.clear()
+        # пользователь, пост и выбранное в форме сообщество; сессия
+        # сохранена при входе и берётся из кеша
+        with self.assertNumQueries(3):
+            self.authorized_client.get(url)
+        # пользователь и сообщество тоже закешированы
+        with self.assertNumQueries(1):
+            self.authorized_client.get(url)
+
+    def test_page_number_redirect_queries(self):
+        with self.assertNumQueries(1):
+            self.guest_client.get(reverse('index') + '?page=2')
+
+
+class FeedCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya')
+        cls.group = Group.objects.create(
+            title='Тест',
+            slug='test',
+            description='Домашние тесты',
+        )
+        cls.post = Post.objects.create(
+            text='Первый пост',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        reset_feed_cache_stats()
+        self.guest_client = Client()
+
+    def test_repeated_feed_is_served_from_cache(self):
+        self.guest_client.get(reverse('index'))
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'Первый пост')
+        self.assertEquals(feed_cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_new_post_invalidates_feeds(self):
+        urls = (
+            reverse('index'),
+            reverse('group_posts', args=[FeedCacheTest.group.slug]),
+            reverse('profile', args=[FeedCacheTest.user]),
+        )
+        for url in urls:
+            self.guest_client.get(url)
+        Post.objects.create(text='Второй пост', author=FeedCacheTest.user,
+                            group=FeedCacheTest.group)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Второй пост')
+
+    def test_group_change_invalidates_old_group(self):
+        url = reverse('group_posts', args=[FeedCacheTest.group.slug])
+        self.guest_client.get(url)
+        post = Post.objects.get(pk=FeedCacheTest.post.pk)
+        post.group = None
+        post.save()
+        self.assertNotContains(self.guest_client.get(url), 'Первый пост')
+
+    def test_profile_cache_varies_for_author(self):
+        url = reverse('profile', args=[FeedCacheTest.user])
+        self.guest_client.get(url)
+        author_client = Client()
+        author_client.force_login(FeedCacheTest.user)
+        self.assertContains(author_client.get(url), 'Редактировать')
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya')
+        cls.bread = Post.objects.create(text='Хлеб и молоко',
+                                        author=cls.user)
+        cls.milk = Post.objects.create(text='Молоко, молоко и ещё молоко',
+                                       author=cls.user)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query):
+        response = self.guest_client.get(reverse('search'), {'q': query})
+        return list(response.context['page'])
+
+    def test_search_ranks_results(self):
+        self.assertEquals(self.search('молоко'),
+                          [SearchViewTest.milk, SearchViewTest.bread])
+
+    def test_search_requires_all_words(self):
+        self.assertEquals(self.search('хлеб молоко'), [SearchViewTest.bread])
+
+    def test_search_ignores_query_syntax(self):
+        self.assertEquals(self.search('"хлеб" OR NOT ('), [])
+        self.assertEquals(self.search(''), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.get(pk=SearchViewTest.bread.pk)
+        post.text = 'Сыр'
+        post.save()
+        self.assertEquals(self.search('хлеб'), [])
+        self.assertEquals(self.search('сыр'), [post])
+        post.delete()
+        self.assertEquals(self.search('сыр'), [])
+
+
+class ExportViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(
+            username='Ya', first_name='Иван')
+        cls.group = Group.objects.create(
+            title='Тест',
+            slug='test',
+            description='Домашние тесты',
+        )
+        for i in range(5):
+            Post.objects.create(text=f'Пост {i}', author=cls.user,
+                                group=cls.group if i % 2 else None)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def export(self, url, **params):
+        response = self.guest_client.get(url, params)
+        self.assertEquals(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_profile_export_ndjson(self):
+        url = reverse('export_profile', args=[ExportViewsTest.user])
+        rows = [json.loads(line) for line in self.export(url).splitlines()]
+        self.assertEquals([row['text'] for row in rows],
+                          [f'Пост {i}' for i in range(4, -1, -1)])
+        self.assertEquals(rows[0]['author_first_name'], 'Иван')
+        self.assertEquals(rows[0]['group'], None)
+        self.assertEquals(rows[1]['group_title'], 'Тест')
+
+    def test_export_continues_from_cursor(self):
+        url = reverse('export_profile', args=[ExportViewsTest.user])
+        rows = [json.loads(line) for line in self.export(url).splitlines()]
+        rest = self.export(url, after=rows[1]['cursor']).splitlines()
+        self.assertEquals([json.loads(line) for line in rest], rows[2:])
+
+    def test_group_export_csv(self):
+        url = reverse('export_group', args=[ExportViewsTest.group.slug])
+        rows = list(csv.DictReader(io.StringIO(self.export(url,
+                                                           format='csv'))))
+        self.assertEquals([row['text'] for row in rows], ['Пост 3', 'Пост 1'])
+
+    def test_export_includes_archived_posts(self):
+        archive_batch(Post.objects.get(text='Пост 2').pub_date, 10)
+        self.assertEquals(ArchivedPost.objects.count(), 2)
+        url = reverse('export_profile', args=[ExportViewsTest.user])
+        rows = [json.loads(line) for line in self.export(url).splitlines()]
+        self.assertEquals([row['text'] for row in rows],
+                          [f'Пост {i}' for i in range(4, -1, -1)])
+        self.assertEquals(rows[3]['group_title'], 'Тест')
+        rest = self.export(url, after=rows[2]['cursor']).splitlines()
+        self.assertEquals([json.loads(line) for line in rest], rows[3:])
+        url = reverse('export_group', args=[ExportViewsTest.group.slug])
+        rows = [json.loads(line) for line in self.export(url).splitlines()]
+        self.assertEquals([row['text'] for row in rows], ['Пост 3', 'Пост 1'])
+        out = io.StringIO()
+        call_command('export_posts', author='Ya', stdout=out)
+        self.assertEquals(len(out.getvalue().splitlines()), 5)
+
+    def test_streamed_export_is_gzipped(self):
+        url = reverse('export_profile', args=[ExportViewsTest.user])
+        plain = self.export(url)
+        response = self.guest_client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEquals(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response.streaming)
+        self.assertEquals(
+            gzip.decompress(b''.join(response.streaming_content)).decode(),
+            plain)
+
+    def test_unknown_format(self):
+        url = reverse('export_group', args=[ExportViewsTest.group.slug])
+        response = self.guest_client.get(url, {'format': 'xml'})
+        self.assertEquals(response.status_code, 404)
+
+
+class PostCardTagTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya.bober+1')
+        cls.post = Post.objects.create(text='Ya', author=cls.user)
+
+    def render(self, user):
+        template = Template('{% load post_cards %}{% post_card post %}')
+        return template.render(Context({'post': PostCardTagTest.post,
+                                        'user': user}))
+
+    def test_card_links_match_reverse(self):
+        card = self.render(PostCardTagTest.user)
+        profile_url = reverse('profile', args=[PostCardTagTest.user])
+        edit_url = reverse('post_edit', args=[PostCardTagTest.user,
+                                              PostCardTagTest.post.id])
+        self.assertIn(f'href="{profile_url}"', card)
+        self.assertIn(f'href="{edit_url}"', card)
+
+    def test_card_links_for_any_username(self):
+        user = get_user_model().objects.create_user(
+            username='__username__987654321')
+        post = Post.objects.create(text='Ya', author=user)
+        template = Template('{% load post_cards %}{% post_card post %}')
+        card = template.render(Context({'post': post, 'user': user}))
+        self.assertIn(f'href="{reverse("profile", args=[user])}"', card)
+        self.assertIn(
+            f'href="{reverse("post_edit", args=[user, post.id])}"', card)
+
+    def test_edit_link_only_for_author(self):
+        self.assertNotIn('Редактировать', self.render(AnonymousUser()))
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya')
+        cls.group = Group.objects.create(
+            title='Тест',
+            slug='test',
+            description='Домашние тесты',
+        )
+        cls.post = Post.objects.create(text='Ya', author=cls.user,
+                                       group=cls.group)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.urls = (
+            reverse('index'),
+            reverse('group_posts', args=[ConditionalGetTest.group.slug]),
+            reverse('profile', args=[ConditionalGetTest.user]),
+            reverse('post', args=[ConditionalGetTest.user,
+                                  ConditionalGetTest.post.id]),
+        )
+
+    def test_unchanged_pages_return_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                # страницы ленты и сообщества проверяются без базы
+                with self.assertNumQueries(
+                        0 if url in self.urls[:2] else 1):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEquals(response.status_code, 304)
+
+    def test_post_edit_changes_validators(self):
+        etags = {url: self.guest_client.get(url)['ETag']
+                 for url in self.urls}
+        post = Post.objects.get(pk=ConditionalGetTest.post.pk)
+        post.text = 'Изменённый текст'
+        post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url,
+                                                 HTTP_IF_NONE_MATCH=etag)
+                self.assertEquals(response.status_code, 200)
+
+    def test_author_rename_changes_feed_validators(self):
+        feeds = self.urls[:3]
+        etags = {url: self.guest_client.get(url)['ETag'] for url in feeds}
+        user = get_user_model().objects.get(pk=ConditionalGetTest.user.pk)
+        user.first_name = 'Новое имя'
+        user.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url,
+                                                 HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'Новое имя')
+
+    def test_gzipped_page_keeps_validator(self):
+        response = self.guest_client.get(self.urls[0],
+                                         HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEquals(response['Content-Encoding'], 'gzip')
+        self.assertIn('<html', gzip.decompress(response.content).decode())
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        response = self.guest_client.get(self.urls[0],
+                                         HTTP_ACCEPT_ENCODING='gzip',
+                                         HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 304)
+
+    def test_post_last_modified(self):
+        url = self.urls[-1]
+        last_modified = self.guest_client.get(url)['Last-Modified']
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEquals(response.status_code, 304)
+
+    def test_validator_depends_on_user(self):
+        etag = self.guest_client.get(self.urls[0])['ETag']
+        author_client = Client()
+        author_client.force_login(ConditionalGetTest.user)
+        response = author_client.get(self.urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEquals(response.status_code, 200)
+
+
+class FollowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = get_user_model().objects.create_user(username='reader')
+        cls.author = get_user_model().objects.create_user(username='author')
+        cls.star = get_user_model().objects.create_user(username='star')
+        cls.old_post = Post.objects.create(text='До подписки',
+                                           author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(FollowTest.reader)
+
+    def follow(self, author):
+        return self.client.get(reverse('profile_follow', args=[author]))
+
+    def feed(self, url=None):
+        # Ленты подписок заполняет фоновый обработчик задач.
+        run_pending()
+        response = self.client.get(url or reverse('follow_index'))
+        return response.context['page']
+
+    def test_follow_fills_timeline_and_counters(self):
+        self.follow(FollowTest.author)
+        new_post = Post.objects.create(text='После подписки',
+                                       author=FollowTest.author)
+        self.assertEquals(list(self.feed()), [new_post, FollowTest.old_post])
+        response = self.client.get(
+            reverse('profile', args=[FollowTest.author]))
+        self.assertEquals(response.context['followers_count'], 1)
+        self.assertTrue(response.context['following'])
+        response = self.client.get(
+            reverse('profile', args=[FollowTest.reader]))
+        self.assertEquals(response.context['following_count'], 1)
+
+    def test_unfollow_clears_timeline(self):
+        self.follow(FollowTest.author)
+        self.client.get(reverse('profile_unfollow', args=[FollowTest.author]))
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEquals(AuthorStats.objects.get(
+            user=FollowTest.author).followers_count, 0)
+        self.assertEquals(list(self.feed()), [])
+
+    def test_cannot_follow_self(self):
+        self.follow(FollowTest.reader)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_popular_authors_are_merged_on_read(self):
+        self.follow(FollowTest.author)
+        with mock.patch('posts.timeline.FOLLOW_FANOUT_LIMIT', 0):
+            self.follow(FollowTest.star)
+            posts = [FollowTest.old_post]
+            for i in range(12):
+                author = FollowTest.star if i % 2 else FollowTest.author
+                posts.append(Post.objects.create(text=f'Пост {i}',
+                                                 author=author))
+            posts.reverse()
+            self.assertFalse(TimelineEntry.objects.filter(
+                author=FollowTest.star).exists())
+            first_page = self.feed()
+            second_page = self.feed(
+                f"{reverse('follow_index')}?after={first_page.next_cursor}")
+        self.assertEquals(list(first_page) + list(second_page), posts)
+
+    def test_popular_threshold_has_hysteresis(self):
+        star_post = Post.objects.create(text='Звезда', author=FollowTest.star)
+        other = Client()
+        other.force_login(FollowTest.author)
+        self.follow(FollowTest.star)
+        with mock.patch('posts.timeline.FOLLOW_FANOUT_LIMIT', 1), \
+                mock.patch('posts.timeline.FOLLOW_FANOUT_REFILL', 0):
+            other.get(reverse('profile_follow', args=[FollowTest.star]))
+            TimelineEntry.objects.all().delete()
+            other.get(reverse('profile_unfollow', args=[FollowTest.star]))
+            run_pending()
+            # Один подписчик у порога: ленты не перестраиваются.
+            self.assertTrue(is_pulled(FollowTest.star.pk))
+            self.assertFalse(TimelineEntry.objects.exists())
+            self.assertEquals(list(self.feed()), [star_post])
+        with mock.patch('posts.timeline.FOLLOW_FANOUT_LIMIT', 1), \
+                mock.patch('posts.timeline.FOLLOW_FANOUT_REFILL', 1):
+            other.get(reverse('profile_follow', args=[FollowTest.star]))
+            other.get(reverse('profile_unfollow', args=[FollowTest.star]))
+            run_pending()
+        self.assertFalse(is_pulled(FollowTest.star.pk))
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=FollowTest.reader, post=star_post).exists())
+
+    def test_backfill_takes_newest_posts(self):
+        new_post = Post.objects.create(text='Свежий', author=FollowTest.author)
+        # Раскладка новых постов, которым ещё не на кого раскладываться.
+        run_pending()
+        with mock.patch('posts.timeline.TIMELINE_BACKFILL_LIMIT', 1):
+            self.follow(FollowTest.author)
+            run_pending()
+        self.assertEquals(
+            list(TimelineEntry.objects.values_list('post_id', flat=True)),
+            [new_post.pk])
+
+
+class ApproximatePaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        user = get_user_model().objects.create_user(username='Ya')
+        for i in range(25):
+            Post.objects.create(text=f'молоко {i}', author=user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_elided_page_range(self):
+        paginator = ApproximatePaginator(Post.objects.all(), 1)
+        self.assertEquals(
+            list(paginator.get_elided_page_range(12)),
+            [1, '…', 9, 10, 11, 12, 13, 14, 15, '…', 25])
+        self.assertEquals(list(paginator.get_elided_page_range(2)),
+                          [1, 2, 3, 4, 5, '…', 25])
+
+    def test_count_stops_at_limit(self):
+        paginator = ApproximatePaginator(Post.objects.all(), 10,
+                                         count_limit=20)
+        self.assertEquals((paginator.count, paginator.num_pages), (20, 2))
+        self.assertFalse(paginator.count_is_exact)
+
+    def test_search_count_is_cached_until_posts_change(self):
+        url = reverse('search')
+        response = self.guest_client.get(url, {'q': 'молоко'})
+        self.assertContains(response, 'Найдено записей: 25')
+        # Без COUNT: только id из индекса и сами посты страницы.
+        with self.assertNumQueries(2):
+            self.guest_client.get(url, {'q': 'молоко', 'page': 2})
+        Post.objects.create(text='молоко',
+                            author=get_user_model().objects.get())
+        response = self.guest_client.get(url, {'q': 'молоко'})
+        self.assertContains(response, 'Найдено записей: 26')
+
+
+class GroupCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya')
+        for title, slug in (('Кошки', 'cats'), ('Котлеты', 'cutlets'),
+                            ('Собаки', 'dogs')):
+            Group.objects.create(title=title, slug=slug)
+
+    def setUp(self):
+        cache.clear()
+        clear_local_groups()
+
+    def test_group_is_cached_by_slug_and_id(self):
+        group = get_group(slug='cats')
+        with self.assertNumQueries(0):
+            self.assertEquals(get_group(slug='cats').title, 'Кошки')
+        clear_local_groups()
+        # общий кеш переживает потерю локального
+        with self.assertNumQueries(0):
+            get_group(slug='cats')
+        self.assertEquals(get_group(pk=group.pk).slug, 'cats')
+        self.assertIsNone(get_group(slug='birds'))
+
+    def test_group_save_invalidates_cache(self):
+        group = Group.objects.get(slug='cats')
+        get_group(slug='cats')
+        group.title = 'Коты'
+        group.save()
+        self.assertEquals(get_group(slug='cats').title, 'Коты')
+        group.delete()
+        self.assertIsNone(get_group(slug='cats'))
+
+    def test_autocomplete_matches_title_prefix(self):
+        response = self.client.get(reverse('group_autocomplete'),
+                                   {'q': ' КО'})
+        titles = [group['title'] for group in response.json()['results']]
+        self.assertEquals(titles, ['Котлеты', 'Кошки'])
+        response = self.client.get(reverse('group_autocomplete'))
+        self.assertEquals(response.json(), {'results': []})
+
+    def test_post_form_renders_only_selected_group(self):
+        client = Client()
+        client.force_login(GroupCacheTest.user)
+        group = Group.objects.get(slug='dogs')
+        post = Post.objects.create(text='Гав', author=GroupCacheTest.user,
+                                   group=group)
+        response = client.get(reverse('post_edit', args=[
+            GroupCacheTest.user, post.pk]))
+        self.assertContains(response, 'Собаки')
+        self.assertNotContains(response, 'Кошки')
+        self.assertContains(response, 'posts/group_autocomplete.js')
+
+
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create_user(username='Ya')
+        cls.reader = get_user_model().objects.create_user(username='Reader')
+        cls.group = Group.objects.create(title='Тест', slug='test')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.posts = []
+        with explicit_pub_date():
+            for i in range(12):
+                cls.posts.append(Post.objects.create(
+                    text=f'Пост {i}', author=cls.user, group=cls.group,
+                    pub_date=datetime(2020, 1 + i % 3, 10 + i,
+                                      tzinfo=timezone.utc)))
+        for i in range(3):
+            cls.posts.append(Post.objects.create(text=f'Новый пост {i}',
+                                                 author=cls.user))
+        run_pending()
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(ArchiveTest.reader)
+
+    def texts(self, url, **params):
+        texts = []
+        while url:
+            response = self.client.get(url, params)
+            page = response.context['page']
+            texts.extend(post.text for post in page)
+            params = {'after': page.next_cursor}
+            url = url if page.next_cursor else None
+        return texts
+
+    def test_archive_moves_old_posts_and_keeps_feeds(self):
+        feeds = [reverse('index'), reverse('follow_index'),
+                 reverse('group_posts', args=['test']),
+                 reverse('profile', args=[ArchiveTest.user])]
+        before = {url: self.texts(url) for url in feeds}
+        out = io.StringIO()
+        call_command('archive_posts', days=30, batch_size=5, stdout=out)
+        self.assertIn('Перенесено в архив постов: 12', out.getvalue())
+        self.assertEquals(Post.objects.count(), 3)
+        self.assertEquals(ArchivedPost.objects.count(), 12)
+        self.assertEquals(AuthorStats.objects.get(
+            user=ArchiveTest.user).posts_count, 15)
+
+        cache.clear()
+        for url in feeds:
+            with self.subTest(url=url):
+                self.assertEquals(self.texts(url), before[url])
+
+        old = ArchiveTest.posts[0]
+        response = self.client.get(
+            reverse('post', args=[ArchiveTest.user, old.pk]))
+        self.assertContains(response, 'Пост 0')
+        self.assertTrue(response.context['post'].archived)
+
+    def test_archived_post_can_be_edited(self):
+        call_command('archive_posts', days=30, stdout=io.StringIO())
+        old = ArchiveTest.posts[0]
+        client = Client()
+        client.force_login(ArchiveTest.user)
+        url = reverse('post_edit', args=[ArchiveTest.user, old.pk])
+        response = client.get(reverse('post',
+                                      args=[ArchiveTest.user, old.pk]))
+        self.assertContains(response, url)
+        self.assertEquals(client.get(url).status_code, 200)
+        client.post(url, {'text': 'Исправленный пост',
+                          'group': ArchiveTest.group.pk})
+        self.assertEquals(Post.objects.get(pk=old.pk).text,
+                          'Исправленный пост')
+        self.assertFalse(ArchivedPost.objects.filter(pk=old.pk).exists())
+        run_pending()
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=ArchiveTest.reader, post_id=old.pk).exists())
+
+    def test_rebuilt_search_index_keeps_archived_posts(self):
+        call_command('archive_posts', days=30, stdout=io.StringIO())
+        out = io.StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Проиндексировано постов: 15', out.getvalue())
+        response = self.client.get(reverse('search'), {'q': 'Пост 7'})
+        self.assertEquals([post.text for post in response.context['page']],
+                          ['Пост 7'])
+        self.assertTrue(response.context['page'][0].archived)
+
+    def test_month_and_year_archives(self):
+        call_command('archive_posts', days=30, stdout=io.StringIO())
+        urls = (reverse('archive_month', args=[2020, 2]),
+                reverse('group_archive_month', args=['test', 2020, 2]),
+                reverse('profile_archive_month',
+                        args=[ArchiveTest.user, 2020, 2]))
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEquals(self.texts(url),
+                                  ['Пост 10', 'Пост 7', 'Пост 4', 'Пост 1'])
+        response = self.client.get(reverse('archive_year', args=[2020]))
+        self.assertEquals([month.month for month, _ in
+                           response.context['months']], [1, 2, 3])
+        self.assertEquals(
+            self.client.get(reverse('archive_month',
+                                    args=[2020, 13])).status_code, 404)
@@ -0,0 +1,71 @@
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.images import ImageFile
+
+from .cache import author_feed, bump_feed_version, group_feed, index_feed
+from .jobs import enqueue, job
+from .models import Post
+from yatube.settings import POST_THUMBNAILS
+
+
+class LookupBackend(ThumbnailBackend):
+    """Находит уже созданную миниатюру, но никогда не создаёт её."""
+
+    def get_cached_thumbnail(self, file_, geometry_string, **options):
+        # Те же параметры по умолчанию, что в ThumbnailBackend.get_thumbnail,
+        # иначе имя миниатюры не совпадёт.
+        source = ImageFile(file_)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+lookup_backend = LookupBackend()
+
+
+def thumbnail_url(image, size):
+    """Адрес миниатюры или оригинала, если миниатюра ещё не готова."""
+    geometry, options = POST_THUMBNAILS[size]
+    thumbnail = lookup_backend.get_cached_thumbnail(image, geometry,
+                                                    **options)
+    if thumbnail is None:
+        return image.url
+    return thumbnail.url
+
+
+def generate_thumbnails(image):
+    for geometry, options in POST_THUMBNAILS.values():
+        default.backend.get_thumbnail(image, geometry, **options)
+
+
+@job
+def generate_post_thumbnails(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id').first()
+    if post is None or not post.image:
+        return
+    generate_thumbnails(post.image)
+    # Фрагменты лент, отрисованные до этого, ссылаются на оригинал.
+    feeds = [index_feed(), author_feed(post.author_id)]
+    if post.group_id is not None:
+        feeds.append(group_feed(post.group_id))
+    bump_feed_version(*feeds)
+
+
+def schedule_thumbnails(post):
+    """Поставить в очередь создание миниатюр картинки поста.
+
+    Имя картинки зависит от содержимого, поэтому для одной картинки
+    задача ставится один раз.
+    """
+    enqueue(generate_post_thumbnails, post.pk,
+            key=f'thumbnails:{post.pk}:{post.image.name}')
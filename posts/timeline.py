@@ -0,0 +1,135 @@
+from django.db import connection
+
+from .jobs import enqueue, job
+from .models import ArchivedPost, AuthorStats, Follow, Post, TimelineEntry
+from .paginators import KeysetPaginator
+from yatube.settings import (FOLLOW_FANOUT_LIMIT, FOLLOW_FANOUT_REFILL,
+                             TIMELINE_BACKFILL_LIMIT)
+
+
+TIMELINE_TABLE = 'posts_timelineentry'
+
+_INSERT = (f'INSERT INTO {TIMELINE_TABLE} '
+           f'(user_id, post_id, author_id, pub_date) '
+           f'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+           f'FROM posts_post p '
+           f'JOIN posts_follow f ON f.author_id = p.author_id ')
+# Задачи могут выполниться повторно или после `fill_timeline`, поэтому
+# уже разложенные посты пропускаются.
+_NOT_IN_TIMELINE = (f'NOT EXISTS (SELECT 1 FROM {TIMELINE_TABLE} t '
+                    f'WHERE t.user_id = f.user_id AND t.post_id = p.id)')
+
+
+def _fan_out(condition, params):
+    # Посты популярных авторов пропускаются: лента подписок подмешивает
+    # их при чтении, см. `TimelinePaginator`.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _INSERT
+            + 'LEFT JOIN posts_authorstats s ON s.user_id = p.author_id '
+            + f'WHERE {condition} AND (s.pulled IS NULL OR NOT s.pulled) '
+            + f'AND {_NOT_IN_TIMELINE}',
+            params)
+
+
+@job
+def fan_out_post(post_id):
+    """Разложить новый пост по лентам подписчиков автора."""
+    _fan_out('p.id = %s', [post_id])
+
+
+def fan_out_posts_after(post_id):
+    """То же для постов с id больше `post_id`.
+
+    Нужен после `bulk_create`, который не отправляет сигналы.
+    """
+    _fan_out('p.id > %s', [post_id])
+
+
+@job
+def fill_timeline(author_id, user_id=None):
+    """Добавить в ленты подписчиков недостающие посты автора.
+
+    Нужен при новой подписке и когда автор перестаёт быть популярным.
+    Берутся только TIMELINE_BACKFILL_LIMIT последних постов.
+    """
+    if is_pulled(author_id):
+        return
+    where = ['f.author_id = %s',
+             'p.id IN (SELECT id FROM posts_post WHERE author_id = %s '
+             'ORDER BY pub_date DESC, id DESC LIMIT %s)']
+    params = [author_id, author_id, TIMELINE_BACKFILL_LIMIT]
+    if user_id is not None:
+        where.append('f.user_id = %s')
+        params.append(user_id)
+    where.append(_NOT_IN_TIMELINE)
+    with connection.cursor() as cursor:
+        cursor.execute(_INSERT + 'WHERE ' + ' AND '.join(where), params)
+
+
+def update_pulled(author_ids):
+    """Перевести авторов между раскладкой и подмешиванием при чтении.
+
+    Порог с гистерезисом: автор начинает подмешиваться, когда подписчиков
+    больше FOLLOW_FANOUT_LIMIT, а возвращается к раскладке, только когда
+    их не больше FOLLOW_FANOUT_REFILL.
+    """
+    stats = AuthorStats.objects.filter(user_id__in=author_ids)
+    stats.filter(pulled=False, followers_count__gt=FOLLOW_FANOUT_LIMIT,
+                 ).update(pulled=True)
+    refill = list(stats.filter(
+        pulled=True, followers_count__lte=FOLLOW_FANOUT_REFILL,
+    ).values_list('user_id', flat=True))
+    if refill:
+        AuthorStats.objects.filter(user_id__in=refill).update(pulled=False)
+    for author_id in refill:
+        enqueue(fill_timeline, author_id)
+
+
+def is_pulled(author_id):
+    return AuthorStats.objects.filter(user_id=author_id, pulled=True).exists()
+
+
+def clear_timeline(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def pulled_authors(user):
+    """Авторы из подписок `user`, чьи посты не раскладываются по лентам."""
+    return list(Follow.objects.filter(
+        user=user, author__stats__pulled=True,
+    ).values_list('author_id', flat=True))
+
+
+class TimelinePaginator(KeysetPaginator):
+    """Лента подписок: готовая лента пользователя плюс посты популярных
+    авторов, которые выбираются при чтении и сливаются по (pub_date, id).
+    """
+
+    pk_field = 'post_id'
+
+    def __init__(self, user, per_page):
+        pulled = pulled_authors(user)
+        entries = TimelineEntry.objects.filter(user=user).select_related(
+            'post__author', 'post__group').defer('post__text')
+        if pulled:
+            entries = entries.exclude(author_id__in=pulled)
+        archived = ArchivedPost.objects.filter(
+            author__following__user=user,
+        ).select_related('author', 'group').defer('text')
+        super().__init__(entries, per_page, archive=archived)
+        self.pulled = None
+        if pulled:
+            self.pulled = KeysetPaginator(
+                Post.objects.filter(author_id__in=pulled).select_related(
+                    'author', 'group').defer('text'),
+                per_page,
+            )
+
+    def select(self, after, before, limit):
+        posts = [entry.post for entry in super().select(after, before, limit)]
+        if self.pulled is not None:
+            posts.extend(self.pulled.select(after, before, limit))
+            posts.sort(key=lambda post: (post.pub_date, post.pk),
+                       reverse=before is None)
+        return posts[:limit]
@@ -6,8 +6,31 @@ from . import views
 urlpatterns = [
     path("", views.index, name="index"),
     path("group/<slug:slug>/", views.group_posts, name="group_posts"),
+    path("group/<slug:slug>/archive/<int:year>/", views.archive_year,
+         name="group_archive_year"),
+    path("group/<slug:slug>/archive/<int:year>/<int:month>/",
+         views.archive_month, name="group_archive_month"),
+    path("groups/autocomplete/", views.group_autocomplete,
+         name="group_autocomplete"),
     path("new/", views.new_post, name="new_post"),
+    path("search/", views.search, name="search"),
+    path("follow/", views.follow_index, name="follow_index"),
+    path("export/group/<slug:slug>/", views.export_group,
+         name="export_group"),
+    path("export/profile/<str:username>/", views.export_profile,
+         name="export_profile"),
+    path("archive/<int:year>/", views.archive_year, name="archive_year"),
+    path("archive/<int:year>/<int:month>/", views.archive_month,
+         name="archive_month"),
     path("<str:username>/", views.profile, name="profile"),
+    path("<str:username>/archive/<int:year>/", views.archive_year,
+         name="profile_archive_year"),
+    path("<str:username>/archive/<int:year>/<int:month>/",
+         views.archive_month, name="profile_archive_month"),
+    path("<str:username>/follow/", views.profile_follow,
+         name="profile_follow"),
+    path("<str:username>/unfollow/", views.profile_unfollow,
+         name="profile_unfollow"),
     path("<str:username>/<int:post_id>/", views.post_view, name="post"),
     path("<str:username>/<int:post_id>/edit/",
          views.post_edit, name="post_edit"),
@@ -1,62 +1,287 @@
+import hashlib
+
+from django.core.paginator import EmptyPage
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django. contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, etag
 
-from .models import Post, Group, User
+from .archive import (find_post, month_range, months_with_posts,
+                      restore_post)
+from .models import ArchivedPost, AuthorStats, Follow, Post, Group, User
+from .cache import author_feed, get_feed_version, group_feed, index_feed
+from .conditional import (group_etag, index_etag, post_etag,
+                          post_last_modified, profile_etag)
+from .decorators import retry_on_locked
+from .export import FORMATS, export_rows
 from .forms import PostForm
-from yatube.settings import TEN_POSTS
+from .groups import autocomplete_groups, get_group
+from .paginators import ApproximatePaginator, KeysetPaginator
+from .search import PostSearchResults
+from .timeline import TimelinePaginator
+from yatube.settings import SEARCH_COUNT_LIMIT, TEN_POSTS
+
+
+def redirect_to_cursor(request, paginator):
+    try:
+        cursor = paginator.cursor_for_page_number(request.GET.get('page'))
+    except EmptyPage:
+        raise Http404('Page number is too large')
+    if cursor is None:
+        return redirect(request.path)
+    return redirect(f'{request.path}?after={cursor}')
+
+
+def author_stats(author):
+    try:
+        return author.stats
+    except AuthorStats.DoesNotExist:
+        return AuthorStats(user=author)
+
+
+def author_counts(author):
+    stats = author_stats(author)
+    return {
+        'posts_count': stats.posts_count,
+        'followers_count': stats.followers_count,
+        'following_count': stats.following_count,
+    }
 
 
+@gzip_page
+@etag(index_etag)
 def index(request):
-    posts = Post.objects.all()
-    paginator = Paginator(posts, TEN_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    context = {'page': page, 'paginator': paginator}
+    posts = Post.objects.select_related('author', 'group').defer('text')
+    archived = ArchivedPost.objects.select_related(
+        'author', 'group').defer('text')
+    paginator = KeysetPaginator(posts, TEN_POSTS, archive=archived)
+    if 'page' in request.GET:
+        return redirect_to_cursor(request, paginator)
+    page = paginator.get_cursor_page(after=request.GET.get('after'),
+                                     before=request.GET.get('before'))
+    context = {'page': page, 'paginator': paginator, 'feed': index_feed()}
     return render(request, 'index.html', context)
 
 
+@gzip_page
+@etag(group_etag)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, TEN_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    context = {'group': group, 'page': page, 'paginator': paginator}
+    group = get_group(slug=slug)
+    if group is None:
+        raise Http404('No Group matches the given query.')
+    posts = group.posts.select_related('author', 'group').defer('text')
+    archived = group.archived_posts.select_related(
+        'author', 'group').defer('text')
+    # Счётчик не входит в закешированную строку сообщества: он меняется
+    # с каждым постом.
+    paginator = KeysetPaginator(
+        posts, TEN_POSTS, archive=archived,
+        count=lambda: Group.objects.filter(pk=group.pk).values_list(
+            'posts_count', flat=True).first() or 0,
+    )
+    if 'page' in request.GET:
+        return redirect_to_cursor(request, paginator)
+    page = paginator.get_cursor_page(after=request.GET.get('after'),
+                                     before=request.GET.get('before'))
+    context = {
+        'group': group,
+        'page': page,
+        'paginator': paginator,
+        'feed': group_feed(group.pk),
+    }
     return render(request, 'group.html', context)
 
 
+@gzip_page
+@etag(profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    author_posts = author.posts.all()
-    paginator = Paginator(author_posts, TEN_POSTS)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    author_posts = author.posts.select_related(
+        'author', 'group').defer('text')
+    archived = author.archived_posts.select_related(
+        'author', 'group').defer('text')
+    paginator = KeysetPaginator(author_posts, TEN_POSTS,
+                                count=author_stats(author).posts_count,
+                                archive=archived)
+    if 'page' in request.GET:
+        return redirect_to_cursor(request, paginator)
+    page = paginator.get_cursor_page(after=request.GET.get('after'),
+                                     before=request.GET.get('before'))
+    is_author = request.user == author
+    following = None
+    if request.user.is_authenticated and not is_author:
+        following = Follow.objects.filter(user=request.user,
+                                          author=author).exists()
     context = {
         'page': page,
         'author': author,
         'author_posts': author_posts,
         'paginator': paginator,
+        **author_counts(author),
+        'feed': author_feed(author.pk),
+        'is_author': is_author,
+        'following': following,
     }
     return render(request, 'profile.html', context)
 
 
+def export_response(request, posts, archived, filename):
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        raise Http404('Unknown export format')
+    render_lines, content_type = FORMATS[fmt]
+    rows = export_rows(posts, after=request.GET.get('after'),
+                       archived=archived)
+    response = StreamingHttpResponse(render_lines(rows),
+                                     content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{fmt}"')
+    return response
+
+
+@gzip_page
+def export_group(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return export_response(request, group.posts.all(),
+                           group.archived_posts.all(), f'group-{group.slug}')
+
+
+@gzip_page
+def export_profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return export_response(request, author.posts.all(),
+                           author.archived_posts.all(),
+                           f'profile-{author.username}')
+
+
+def group_autocomplete(request):
+    groups = autocomplete_groups(request.GET.get('q', ''))
+    return JsonResponse({'results': [
+        {'id': pk, 'title': title, 'slug': slug}
+        for pk, title, slug in groups
+    ]}, json_dumps_params={'ensure_ascii': False})
+
+
+@gzip_page
+def search(request):
+    query = request.GET.get('q', '').strip()
+    # Любое изменение поста меняет версию общей ленты, поэтому
+    # закешированное число результатов не переживает изменений.
+    count_key = 'search:{}:{}'.format(
+        hashlib.md5(query.encode()).hexdigest(),
+        get_feed_version(index_feed()),
+    )
+    paginator = ApproximatePaginator(PostSearchResults(query), TEN_POSTS,
+                                     count_limit=SEARCH_COUNT_LIMIT,
+                                     count_key=count_key)
+    page = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page': page,
+        'paginator': paginator,
+        'page_range': paginator.get_elided_page_range(page.number),
+    }
+    return render(request, 'search.html', context)
+
+
+def archive_feed(slug=None, username=None):
+    """Рабочая и архивная выборки ленты, её название и начало адреса."""
+    posts = Post.objects.select_related('author', 'group').defer('text')
+    archived = ArchivedPost.objects.select_related(
+        'author', 'group').defer('text')
+    if slug is not None:
+        group = get_group(slug=slug)
+        if group is None:
+            raise Http404('No Group matches the given query.')
+        return (posts.filter(group_id=group.pk),
+                archived.filter(group_id=group.pk),
+                group.title, 'group_archive', [slug])
+    if username is not None:
+        author = get_object_or_404(User, username=username)
+        return (posts.filter(author_id=author.pk),
+                archived.filter(author_id=author.pk),
+                f'@{author.username}', 'profile_archive', [username])
+    return posts, archived, 'Все записи', 'archive', []
+
+
+def archive_dates(year, month=None):
+    try:
+        return month_range(year, month)
+    except (ValueError, OverflowError):
+        raise Http404('No such date')
+
+
+@gzip_page
+def archive_year(request, year, slug=None, username=None):
+    start, end = archive_dates(year)
+    posts, archived, title, url_name, args = archive_feed(slug, username)
+    in_year = {'pub_date__gte': start, 'pub_date__lt': end}
+    months = months_with_posts(posts.filter(**in_year),
+                               archived.filter(**in_year))
+    context = {
+        'title': title,
+        'year': year,
+        'months': [
+            (month, reverse(f'{url_name}_month',
+                            args=[*args, year, month.month]))
+            for month in months
+        ],
+    }
+    return render(request, 'archive_year.html', context)
+
+
+@gzip_page
+def archive_month(request, year, month, slug=None, username=None):
+    start, end = archive_dates(year, month)
+    posts, archived, title, url_name, args = archive_feed(slug, username)
+    in_month = {'pub_date__gte': start, 'pub_date__lt': end}
+    paginator = KeysetPaginator(posts.filter(**in_month), TEN_POSTS,
+                                archive=archived.filter(**in_month))
+    page = paginator.get_cursor_page(after=request.GET.get('after'),
+                                     before=request.GET.get('before'))
+    context = {
+        'title': title,
+        'month': start,
+        'year_url': reverse(f'{url_name}_year', args=[*args, year]),
+        'page': page,
+        'paginator': paginator,
+    }
+    return render(request, 'archive_month.html', context)
+
+
+@gzip_page
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
+    post = find_post(('author__stats', 'group'),
+                     author__username=username, id=post_id)
+    if post is None:
+        raise Http404('No Post matches the given query.')
     context = {
         'author': post.author,
         'post': post,
+        **author_counts(post.author),
     }
     return render(request, 'post.html', context)
 
 
+@gzip_page
 @login_required
+@retry_on_locked
 def post_edit(request, username, post_id):
-    post = get_object_or_404(Post, author__username=username, id=post_id)
+    post = find_post(('author', 'group'),
+                     author__username=username, id=post_id)
+    if post is None:
+        raise Http404('No Post matches the given query.')
+    if post.archived and request.method == 'POST':
+        post = restore_post(post.pk)
 
     group = post.group
 
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(request.POST or None, files=request.FILES or None,
+                    instance=post)
     if form.is_valid():
         form.save()
         return redirect('post', username=post.author.username, post_id=post.id)
@@ -69,9 +294,11 @@ def post_edit(request, username, post_id):
     return render(request, 'post_edit.html', context)
 
 
+@gzip_page
 @login_required
+@retry_on_locked
 def new_post(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -80,3 +307,30 @@ def new_post(request):
 
     context = {'form': form}
     return render(request, 'new_post.html', context)
+
+
+@gzip_page
+@login_required
+def follow_index(request):
+    paginator = TimelinePaginator(request.user, TEN_POSTS)
+    page = paginator.get_cursor_page(after=request.GET.get('after'),
+                                     before=request.GET.get('before'))
+    context = {'page': page, 'paginator': paginator}
+    return render(request, 'follow.html', context)
+
+
+@login_required
+@retry_on_locked
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('profile', username=username)
+
+
+@login_required
+@retry_on_locked
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    Follow.objects.filter(user=request.user, author=author).delete()
+    return redirect('profile', username=username)
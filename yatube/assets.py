@@ -0,0 +1,105 @@
+import gzip
+import mimetypes
+import os
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.static import serve
+
+from yatube.settings import STATIC_CACHE_MAX_AGE
+
+try:
+    import brotli
+except ImportError:
+    # brotli необязателен: без него остаются только gzip-варианты.
+    brotli = None
+
+
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.xml',
+                '.html', '.ico', '.ttf', '.otf', '.eot')
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+
+
+def gzip_compress(data):
+    # mtime=0, чтобы повторный collectstatic давал те же байты.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+# (кодировка, суффикс файла, функция сжатия) в порядке предпочтения.
+ENCODINGS = [('gzip', '.gz', gzip_compress)]
+if brotli is not None:
+    ENCODINGS.insert(0, ('br', '.br', brotli.compress))
+
+
+def accepts_encoding(request, encoding):
+    return re.search(rf'\b{encoding}\b',
+                     request.META.get('HTTP_ACCEPT_ENCODING', '')) is not None
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и заранее сжатыми копиями.
+
+    `collectstatic` пишет рядом с каждым текстовым файлом `.gz` и, если
+    установлен brotli, `.br`, поэтому при запросе ничего не сжимается.
+    Файлы, которых ещё нет в манифесте, отдаются под своими именами.
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run=dry_run, **options):
+            if processed and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            self.compress(hashed_name)
+
+    def compress(self, name):
+        if not name.lower().endswith(COMPRESSIBLE):
+            return
+        with self.open(name) as original:
+            data = original.read()
+        for _, suffix, compress in ENCODINGS:
+            compressed = compress(data)
+            # Сжатая копия, которая не меньше оригинала, только мешает.
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+def serve_static(request, path, document_root=None):
+    """Отдать собранную статику в режиме разработки.
+
+    Выбирает заранее сжатую копию по Accept-Encoding. Файлы с хешем в
+    имени кешируются бессрочно. В продакшене то же делает веб-сервер.
+    """
+    response = None
+    for encoding, suffix, _ in ENCODINGS:
+        if (accepts_encoding(request, encoding)
+                and os.path.isfile(safe_join(document_root, path + suffix))):
+            response = serve(request, path + suffix,
+                             document_root=document_root)
+            response['Content-Type'] = (mimetypes.guess_type(path)[0]
+                                        or 'application/octet-stream')
+            response['Content-Encoding'] = encoding
+            break
+    if response is None:
+        response = serve(request, path, document_root=document_root)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if HASHED_NAME.search(path):
+        patch_cache_control(response, public=True, immutable=True,
+                            max_age=STATIC_CACHE_MAX_AGE)
+    return response
@@ -0,0 +1,90 @@
+"""Определение пользователя запроса с кешем в памяти процесса.
+
+Повторяет `django.contrib.auth.get_user`, но строку пользователя берёт
+из кеша. Проверка хеша пароля в сессии остаётся, поэтому смена пароля
+по-прежнему завершает остальные сессии.
+
+Кеш у каждого процесса свой. Выход, блокировка (`is_active = False`,
+в том числе перед пакетным удалением) или смена пароля в одном процессе
+другие процессы замечают при чтении только через USER_CACHE_TTL и
+SESSION_CACHE_TTL секунд. Запросы, которые что-то меняют, поэтому
+всегда перечитывают сессию и пользователя из базы.
+"""
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model, load_backend)
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from yatube.lru import LRUCache
+from yatube.routers import SAFE_METHODS
+from yatube.sessions import SESSIONS
+from yatube.settings import USER_CACHE_SIZE, USER_CACHE_TTL
+
+
+USERS = LRUCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+
+def cached_user(user_id, backend_path, fresh=False):
+    # В кеше лежат значения полей, а не объект: каждому запросу
+    # достаётся свой экземпляр, который можно менять.
+    User = get_user_model()
+    entry = None if fresh else USERS.get(user_id)
+    if entry is not None:
+        db, names, values = entry
+        return User.from_db(db, names, values)
+    user = load_backend(backend_path).get_user(user_id)
+    if user is not None:
+        names = [field.attname for field in User._meta.concrete_fields]
+        USERS.set(user_id, (user._state.db, names,
+                            [getattr(user, name) for name in names]))
+    return user
+
+
+def get_user(request):
+    try:
+        user_id = get_user_model()._meta.pk.to_python(
+            request.session[SESSION_KEY])
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    user = cached_user(user_id, backend_path,
+                       fresh=request.method not in SAFE_METHODS)
+    if user is None:
+        # Пользователь удалён или заблокирован: старая запись кеша не
+        # должна пережить этот запрос.
+        USERS.delete(user_id)
+        return AnonymousUser()
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not (session_hash and constant_time_compare(
+            session_hash, user.get_session_auth_hash())):
+        request.session.flush()
+        return AnonymousUser()
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        session_key = request.session.session_key
+        if request.method not in SAFE_METHODS and session_key:
+            # Сессию могли завершить в другом процессе.
+            SESSIONS.delete(session_key)
+
+        def resolve():
+            if not hasattr(request, '_cached_user'):
+                request._cached_user = get_user(request)
+            return request._cached_user
+
+        request.user = SimpleLazyObject(resolve)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_user(sender, instance, **kwargs):
+    USERS.delete(instance.pk)
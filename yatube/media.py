@@ -0,0 +1,39 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+from yatube.settings import MEDIA_CACHE_MAX_AGE
+
+
+class ContentHashedStorage(FileSystemStorage):
+    """Хранилище, которое называет файлы по хешу их содержимого.
+
+    Имя меняется только вместе с содержимым, поэтому файлы можно отдавать
+    с бессрочным кешированием, а одинаковые загрузки делят один файл.
+    """
+
+    def save(self, name, content, max_length=None):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = os.path.join(directory, digest.hexdigest()[:32] + extension)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+
+def serve_media(request, path, document_root=None):
+    """Отдать загруженный файл в режиме разработки.
+
+    В продакшене то же делает веб-сервер; заголовки должны совпадать.
+    """
+    response = serve(request, path, document_root=document_root)
+    patch_cache_control(response, public=True, immutable=True,
+                        max_age=MEDIA_CACHE_MAX_AGE)
+    return response
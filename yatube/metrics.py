@@ -0,0 +1,184 @@
+"""Замеры времени обработки запросов и их выдача в формате Prometheus."""
+import bisect
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import HttpResponse
+from django.template.backends.django import DjangoTemplates, Template
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current = ContextVar('request_timings', default=None)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, label_name='view'):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label_name = label_name
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, label, value):
+        with self.lock:
+            counts, total = self.values.get(
+                label, ([0] * (len(self.buckets) + 1), 0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.values[label] = (counts, total + value)
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.help_text}',
+                 f'# TYPE {self.name} histogram']
+        with self.lock:
+            values = sorted((label, list(counts), total)
+                            for label, (counts, total) in self.values.items())
+        for label, counts, total in values:
+            label = f'{self.label_name}="{label}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},'
+                             f'le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {total}')
+            lines.append(f'{self.name}_count{{{label}}} {cumulative}')
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+
+REQUEST_DURATION = Histogram('yatube_request_duration_seconds',
+                             'Полное время обработки запроса',
+                             DURATION_BUCKETS)
+DB_QUERIES = Histogram('yatube_db_queries', 'Число SQL-запросов на запрос',
+                       QUERY_BUCKETS)
+DB_DURATION = Histogram('yatube_db_duration_seconds',
+                        'Время SQL-запросов на запрос', DURATION_BUCKETS)
+TEMPLATE_DURATION = Histogram('yatube_template_duration_seconds',
+                              'Время отрисовки шаблонов на запрос',
+                              DURATION_BUCKETS)
+RESPONSE_SIZE = Histogram('yatube_response_size_bytes',
+                          'Размер тела ответа', SIZE_BUCKETS)
+JOB_DURATION = Histogram('yatube_job_duration_seconds',
+                         'Время выполнения фоновой задачи',
+                         DURATION_BUCKETS, label_name='job')
+HISTOGRAMS = (REQUEST_DURATION, DB_QUERIES, DB_DURATION, TEMPLATE_DURATION,
+              RESPONSE_SIZE, JOB_DURATION)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_time += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Шаблонный движок Django, засекающий время отрисовки."""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code),
+                                    self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        REQUEST_DURATION.observe(view, duration)
+        DB_QUERIES.observe(view, timings.queries)
+        DB_DURATION.observe(view, timings.db_time)
+        TEMPLATE_DURATION.observe(view, timings.template_time)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(view, len(response.content))
+
+        response['Server-Timing'] = ', '.join((
+            f'total;dur={duration * 1000:.1f}',
+            f'db;dur={timings.db_time * 1000:.1f};'
+            f'desc="{timings.queries} queries"',
+            f'tpl;dur={timings.template_time * 1000:.1f}',
+        ))
+        return response
+
+
+def exposition():
+    from posts.cache import feed_cache_stats
+    from yatube.auth import USERS
+    from yatube.sessions import SESSIONS
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.exposition())
+    stats = feed_cache_stats()
+    lines.extend([
+        '# HELP yatube_feed_cache_requests_total Обращения к кешу лент',
+        '# TYPE yatube_feed_cache_requests_total counter',
+        f'yatube_feed_cache_requests_total{{result="hit"}} {stats["hits"]}',
+        f'yatube_feed_cache_requests_total{{result="miss"}} '
+        f'{stats["misses"]}',
+        '# HELP yatube_local_cache_requests_total Обращения к кешам '
+        'сессий и пользователей в памяти процесса',
+        '# TYPE yatube_local_cache_requests_total counter',
+    ])
+    for name, local_cache in (('session', SESSIONS), ('user', USERS)):
+        stats = local_cache.stats()
+        for result, count in (('hit', stats['hits']),
+                              ('miss', stats['misses'])):
+            lines.append(f'yatube_local_cache_requests_total{{cache="{name}",'
+                         f'result="{result}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+@staff_member_required
+def metrics_view(request):
+    return HttpResponse(exposition(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
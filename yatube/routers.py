@@ -0,0 +1,77 @@
+"""Разделение чтений между основной базой и репликами.
+
+Ленты, профили и страницы постов читаются с реплик из
+DATABASE_REPLICAS. Всё остальное, а также любые чтения после записи
+в том же запросе идут в основную базу. Автору, который только что
+что-то записал, кука на REPLICA_PIN_SECONDS закрепляет чтения за
+основной базой, пока реплика не догонит её.
+
+Реплики используются только внутри запроса, обработанного
+ReplicaPinningMiddleware. Команды, обработчик задач и потоки вне запроса
+всегда работают с основной базой, и закрепление между ними не
+переносится.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_in_request = ContextVar('in_request', default=False)
+_pinned = ContextVar('pinned_to_primary', default=False)
+_wrote = ContextVar('wrote_to_primary', default=False)
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+class PrimaryReplicaRouter:
+    replica_apps = ('posts', 'auth')
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or not _in_request.get() or is_pinned()
+                or model._meta.app_label not in self.replica_apps):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if _in_request.get():
+            _pinned.set(True)
+            _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+
+class ReplicaPinningMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = (request.method not in SAFE_METHODS
+                  or PIN_COOKIE in request.COOKIES)
+        request_token = _in_request.set(True)
+        pinned_token = _pinned.set(pinned)
+        wrote_token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get() and settings.DATABASE_REPLICAS:
+                response.set_cookie(PIN_COOKIE, '1', httponly=True,
+                                    max_age=settings.REPLICA_PIN_SECONDS)
+        finally:
+            _in_request.reset(request_token)
+            _pinned.reset(pinned_token)
+            _wrote.reset(wrote_token)
+        return response
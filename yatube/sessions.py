@@ -0,0 +1,53 @@
+"""Сессии в базе с кешем в памяти процесса.
+
+Подключается через SESSION_ENGINE = 'yatube.sessions'. Кешируется
+закодированная строка сессии, поэтому каждый запрос получает свой
+словарь, а подделанная запись не пройдёт проверку подписи.
+
+Кеш у каждого процесса свой: сессия, завершённая выходом или `flush()`
+в одном процессе, в остальных остаётся действительной для чтения ещё
+до SESSION_CACHE_TTL секунд. Изменяющие запросы сбрасывают запись
+сессии перед загрузкой (см. `yatube.auth`), а сохранение изменённой
+сессии, которой уже нет в базе, и так завершается ошибкой.
+"""
+from django.contrib.sessions.backends import db
+from django.utils import timezone
+
+from yatube.lru import LRUCache
+from yatube.settings import SESSION_CACHE_SIZE, SESSION_CACHE_TTL
+
+
+SESSIONS = LRUCache(SESSION_CACHE_SIZE, SESSION_CACHE_TTL)
+
+
+class SessionStore(db.SessionStore):
+    def load(self):
+        entry = SESSIONS.get(self.session_key)
+        if entry is not None:
+            session_data, expire_date = entry
+            if expire_date > timezone.now():
+                return self.decode(session_data)
+            SESSIONS.delete(self.session_key)
+        session = self._get_session_from_db()
+        if session is None:
+            return {}
+        SESSIONS.set(session.session_key,
+                     (session.session_data, session.expire_date))
+        return self.decode(session.session_data)
+
+    def create_model_instance(self, data):
+        self._saved = super().create_model_instance(data)
+        return self._saved
+
+    def save(self, must_create=False):
+        super().save(must_create=must_create)
+        saved = getattr(self, '_saved', None)
+        if saved is not None:
+            SESSIONS.set(saved.session_key,
+                         (saved.session_data, saved.expire_date))
+
+    def delete(self, session_key=None):
+        session_key = session_key or self.session_key
+        if session_key is not None:
+            SESSIONS.delete(session_key)
+        super().delete(session_key)
@@ -35,24 +35,28 @@ ALLOWED_HOSTS = [
 # Application definition
 
 INSTALLED_APPS = [
-    'posts',
+    'posts.apps.PostsConfig',
     'users',
     'about',
+    'api',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'sorl.thumbnail',
     # 'rest_framework',
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.RequestMetricsMiddleware',
+    'yatube.routers.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yatube.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,7 +68,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.metrics.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,8 +90,33 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'PRAGMAS': {
+            'busy_timeout': 5000,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,
+        },
+    }
+}
+
+# Реплики для чтения лент. Для проверки на одной машине достаточно
+# скопировать db.sqlite3 и указать путь к копии в YATUBE_REPLICA_DB.
+DATABASE_REPLICAS = []
+REPLICA_DB = os.environ.get('YATUBE_REPLICA_DB')
+if REPLICA_DB:
+    DATABASES['replica'] = dict(DATABASES['default'], NAME=REPLICA_DB)
+    DATABASE_REPLICAS.append('replica')
+
+DATABASE_ROUTERS = ['yatube.routers.PrimaryReplicaRouter']
+
+# Сколько секунд после записи читать из основной базы.
+REPLICA_PIN_SECONDS = 10
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
@@ -136,8 +165,72 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+# collectstatic добавляет к именам хеш содержимого и пишет сжатые копии.
+STATICFILES_STORAGE = 'yatube.assets.CompressedManifestStorage'
+STATIC_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Имена загруженных файлов и миниатюр зависят от содержимого,
+# поэтому кешировать их можно на год.
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24 * 365
 
 LOGIN_URL = 'auth/login/'
 LOGIN_REDIRECT_URL = 'index'
 
 TEN_POSTS = 10
+# Старые ссылки ?page=N перенаправляются на курсор только до этой
+# страницы; дальше OFFSET стоил бы обхода всего индекса.
+LEGACY_PAGE_LIMIT = 100
+# Дальше этого числа результаты поиска не считаются.
+SEARCH_COUNT_LIMIT = 1000
+
+FEED_CACHE_ALIAS = 'default'
+FEED_CACHE_TIMEOUT = 60 * 15
+
+# Посты авторов, у которых подписчиков больше этого числа, не копируются
+# в ленты подписок при публикации, а подмешиваются при чтении. Обратно
+# автор переходит, только когда подписчиков не больше FOLLOW_FANOUT_REFILL,
+# чтобы подписки и отписки у порога не перестраивали ленты каждый раз.
+FOLLOW_FANOUT_LIMIT = 1000
+FOLLOW_FANOUT_REFILL = 900
+# Сколько последних постов автора дописывается в ленту при подписке и
+# при возврате автора к раскладке.
+TIMELINE_BACKFILL_LIMIT = 200
+
+# Размеры миниатюр, которые создаются сразу после загрузки картинки.
+POST_THUMBNAILS = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+
+# Через сколько секунд задача, взятая упавшим обработчиком, снова
+# считается свободной, и базовая пауза перед повтором упавшей задачи.
+JOB_LOCK_TIMEOUT = 60 * 5
+JOB_RETRY_BACKOFF = 5
+
+# Сколько постов можно запросить одним обращением к /api/v1/posts/multi/.
+API_MAX_IDS = 100
+
+# Сессии и пользователи запросов кешируются в памяти процесса.
+# Срок жизни записи ограничивает, как долго другой процесс может не
+# замечать выхода из системы или блокировки пользователя.
+SESSION_ENGINE = 'yatube.sessions'
+SESSION_CACHE_SIZE = 10000
+SESSION_CACHE_TTL = 60
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL = 60
+
+# Сообщества кешируются в памяти процесса поверх общего кеша.
+GROUP_CACHE_SIZE = 10000
+GROUP_AUTOCOMPLETE_LIMIT = 10
+
+# Длина отрывка поста в списках, не больше 255 символов.
+POST_EXCERPT_LENGTH = 200
+
+# Посты старше этого числа дней archive_posts переносит в архивную
+# таблицу, чтобы рабочая таблица и её индексы оставались в памяти.
+POST_ARCHIVE_AFTER_DAYS = 365
+
+# Сколько строк удаляет одна транзакция при удалении пользователя
+# или сообщества; остальные запросы ждут не дольше одной пачки.
+DELETE_BATCH_SIZE = 500
@@ -0,0 +1,31 @@
+"""SQLite с настройками для одновременной работы читателей и писателей.
+
+Прагмы задаются ключом PRAGMAS в настройках базы и дополняют
+значения по умолчанию::
+
+    'PRAGMAS': {'mmap_size': 0}
+"""
+from django.db.backends.sqlite3 import base
+
+
+DEFAULT_PRAGMAS = {
+    # WAL позволяет читателям не ждать писателя и наоборот.
+    'journal_mode': 'wal',
+    # В режиме WAL NORMAL не теряет целостность, а fsync реже.
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер кеша страниц в КиБ.
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = dict(DEFAULT_PRAGMAS, **self.settings_dict.get('PRAGMAS',
+                                                                 {}))
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
@@ -14,12 +14,25 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
+from django.conf import settings
+from django.conf.urls.static import static
 from django.urls import path, include
 
+from .assets import serve_static
+from .media import serve_media
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
+    path('api/v1/', include('api.urls', namespace='api')),
     path('', include('posts.urls')),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
 ]
+
+urlpatterns += static(settings.MEDIA_URL, view=serve_media,
+                      document_root=settings.MEDIA_ROOT)
+urlpatterns += static(settings.STATIC_URL, view=serve_static,
+                      document_root=settings.STATIC_ROOT)